@@ -0,0 +1,89 @@
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import NamedTuple
+
+from enigma import Enigma
+
+IO_THREADS = 4
+CIPHER_POSTFIX = "__cipher.txt"
+_OWN_FILES_MARKERS = (CIPHER_POSTFIX, "__key.bin", "__settings_")
+
+
+class BatchResult(NamedTuple):
+    path: str
+    size: int
+    seconds: float
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.size / 1e6 / self.seconds if self.seconds else float("inf")
+
+
+def collect_batch_files(pattern: str) -> list[str]:
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*")
+
+    return sorted(
+        path
+        for path in glob.glob(pattern)
+        if os.path.isfile(path)
+        and not any(marker in path for marker in _OWN_FILES_MARKERS)
+    )
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def encrypt_batch(
+    enigma: Enigma, paths: list[str], io_threads: int = IO_THREADS
+) -> list[BatchResult]:
+    """
+    Шифрует каждый файл одной и той же enigma, каждый -- с нулевого смещения.
+    Чтение и запись идут в пуле потоков параллельно с шифрованием,
+    в полете держится не больше io_threads файлов на чтение и на запись.
+    """
+    results: list[BatchResult] = []
+    pending_paths = iter(paths)
+    reads: deque[tuple[str, Future]] = deque()
+    writes: deque[Future] = deque()
+
+    with ThreadPoolExecutor(max_workers=io_threads) as pool:
+
+        def submit_read() -> None:
+            path = next(pending_paths, None)
+            if path is not None:
+                reads.append((path, pool.submit(_read, path)))
+
+        for _ in range(io_threads):
+            submit_read()
+
+        while reads:
+            path, future = reads.popleft()
+            data = future.result()
+            submit_read()
+
+            t1 = time.perf_counter()
+            enigma.seek(0)
+            cipher = enigma.encrypt_buffer(data)
+            t2 = time.perf_counter()
+
+            results.append(BatchResult(path, len(data), t2 - t1))
+
+            writes.append(pool.submit(_write, f"{path}{CIPHER_POSTFIX}", cipher))
+            while len(writes) > io_threads:
+                writes.popleft().result()
+
+        while writes:
+            writes.popleft().result()
+
+    return results
@@ -0,0 +1,205 @@
+import json
+import platform
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+import click
+import numpy as np
+
+from enigma import CompiledEnigma, EnigmaKey, MultiRotorEnigma
+from misc import make_new_rand_enigma
+
+DEFAULT_SIZES = "1K,64K,1M,16M,256M,1G"
+# Побайтовые движки на больших буферах работают часами
+PER_BYTE_MAX_SIZE = 1 << 20
+_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+class Engine(NamedTuple):
+    make: Callable[[EnigmaKey], object]
+    run: Callable[[object, bytes], bytes]
+    per_byte: bool
+
+
+class Measurement(NamedTuple):
+    engine: str
+    data: str
+    size: int
+    seconds: float
+    bytes_per_sec: float
+    ns_per_byte: float
+    peak_memory_bytes: int
+
+
+def _rotors_and_reflector(key: EnigmaKey):
+    enigma = key.make_enigma()
+    return enigma.rotors, enigma.reflector
+
+
+def _per_byte(enigma, data: bytes) -> bytes:
+    encrypt = enigma.encrypt
+    return bytes([encrypt(letter) for letter in data])
+
+
+ENGINES: dict[str, Engine] = {
+    "per_byte": Engine(EnigmaKey.make_enigma, _per_byte, True),
+    "compiled": Engine(
+        lambda key: CompiledEnigma.from_enigma(key.make_enigma()),
+        CompiledEnigma.encrypt_bytes,
+        True,
+    ),
+    "multi_rotor_per_byte": Engine(
+        lambda key: MultiRotorEnigma(*_rotors_and_reflector(key)), _per_byte, True
+    ),
+    "numpy": Engine(
+        EnigmaKey.make_enigma, lambda enigma, data: enigma.encrypt_buffer(data), False
+    ),
+    "multi_rotor_numpy": Engine(
+        lambda key: MultiRotorEnigma(*_rotors_and_reflector(key)),
+        MultiRotorEnigma.encrypt_buffer,
+        False,
+    ),
+}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    if value[-1] in _UNITS:
+        return int(value[:-1]) * _UNITS[value[-1]]
+    return int(value)
+
+
+def make_data(kind: str, size: int, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    if kind == "random":
+        return rng.bytes(size)
+    if kind == "low_entropy":
+        # Текст из четырех символов
+        return (rng.integers(0, 4, size, dtype=np.uint8) + ord("a")).tobytes()
+    raise ValueError(f"Unknown data kind {kind}")
+
+
+def measure(
+    name: str, key: EnigmaKey, kind: str, data: bytes, repeat: int
+) -> Measurement:
+    engine = ENGINES[name]
+
+    best = float("inf")
+    for _ in range(repeat):
+        enigma = engine.make(key)
+        t1 = time.perf_counter()
+        engine.run(enigma, data)
+        t2 = time.perf_counter()
+        best = min(best, t2 - t1)
+
+    # Память меряется отдельным прогоном: tracemalloc замедляет шифрование
+    enigma = engine.make(key)
+    tracemalloc.start()
+    engine.run(enigma, data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size = len(data)
+    return Measurement(
+        engine=name,
+        data=kind,
+        size=size,
+        seconds=best,
+        bytes_per_sec=size / best if best else float("inf"),
+        ns_per_byte=best * 1e9 / size,
+        peak_memory_bytes=peak,
+    )
+
+
+@click.command()
+@click.option(
+    "--sizes",
+    default=DEFAULT_SIZES,
+    show_default=True,
+    help="Размеры буферов через запятую (K, M, G -- двоичные единицы)",
+)
+@click.option(
+    "--engines",
+    default=",".join(ENGINES),
+    show_default=True,
+    help="Движки через запятую",
+)
+@click.option(
+    "--per_byte_max_size",
+    default=str(PER_BYTE_MAX_SIZE),
+    show_default=True,
+    help="Максимальный размер буфера для побайтовых движков",
+)
+@click.option("--repeat", type=click.IntRange(min=1), default=3, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    default="benchmark.json",
+    show_default=True,
+    help="Файл с результатами в JSON",
+)
+def run(
+    sizes: str,
+    engines: str,
+    per_byte_max_size: str,
+    repeat: int,
+    seed: int,
+    output: str,
+) -> None:
+    engine_names = [name.strip() for name in engines.split(",") if name.strip()]
+    unknown = set(engine_names) - set(ENGINES)
+    if unknown:
+        click.secho(f"Неизвестные движки: {', '.join(sorted(unknown))}", fg="red")
+        return
+
+    per_byte_limit = parse_size(per_byte_max_size)
+
+    random.seed(seed)
+    key = EnigmaKey.from_enigma(make_new_rand_enigma())
+
+    results: list[Measurement] = []
+    for size in map(parse_size, sizes.split(",")):
+        for kind in ("random", "low_entropy"):
+            data = make_data(kind, size, seed)
+
+            for name in engine_names:
+                if ENGINES[name].per_byte and size > per_byte_limit:
+                    continue
+
+                result = measure(name, key, kind, data, repeat)
+                results.append(result)
+                click.echo(
+                    f"{name:>22} {kind:>11} {size:>11} B: "
+                    f"{result.bytes_per_sec / 1e6:10.2f} MB/s, "
+                    f"{result.ns_per_byte:10.2f} ns/B, "
+                    f"peak {result.peak_memory_bytes / 1e6:.2f} MB"
+                )
+
+            del data
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": [result._asdict() for result in results],
+    }
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    click.secho(f"Результаты записаны в {output}", fg="green", bold=True)
+
+
+if __name__ == "__main__":
+    run()
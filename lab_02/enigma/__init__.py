@@ -1,3 +1,7 @@
 from .enigma import Enigma
+from .compiled import CompiledEnigma
+from .key import EnigmaKey
+from .multi_rotor import MultiRotorEnigma
 from .rotor import Rotor
 from .reflector import Reflector
+from .stream import EnigmaStream
@@ -0,0 +1,44 @@
+from .enigma import Enigma
+
+
+class CompiledEnigma(Enigma):
+    """
+    Табличный режим Enigma: тот же шифр, что и у Enigma,
+    но на каждый байт приходится только индексирование заранее
+    построенных таблиц прямой и обратной коммутации, без вызовов
+    Rotor.straight/Rotor.back.
+    """
+
+    def encrypt(self, letter: int) -> int:
+        left, mid, right = self._left_rotor, self._mid_rotor, self._right_rotor
+
+        # Тот же шаг, что и в Enigma._turn_rotors
+        self._offset += 1
+        rs = right._curr_start = (right._curr_start + 1) & 0xFF
+        if rs == 0:
+            ms = mid._curr_start = (mid._curr_start + 1) & 0xFF
+            if ms == 0:
+                left._curr_start = (left._curr_start + 1) & 0xFF
+        ms = mid._curr_start
+        ls = left._curr_start
+
+        letter = (right._wires[(letter + rs) & 0xFF] - rs) & 0xFF
+        letter = (mid._wires[(letter + ms) & 0xFF] - ms) & 0xFF
+        letter = (left._wires[(letter + ls) & 0xFF] - ls) & 0xFF
+
+        letter = self._reflector._wires[letter]
+
+        letter = (left._inverse[(letter + ls) & 0xFF] - ls) & 0xFF
+        letter = (mid._inverse[(letter + ms) & 0xFF] - ms) & 0xFF
+        letter = (right._inverse[(letter + rs) & 0xFF] - rs) & 0xFF
+
+        return letter
+
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        encrypt = self.encrypt
+        return bytes([encrypt(letter) for letter in data])
+
+    @classmethod
+    def from_enigma(cls, enigma: Enigma) -> "CompiledEnigma":
+        left, mid, right = enigma.rotors
+        return cls(left, mid, right, enigma.reflector)
@@ -1,6 +1,10 @@
+import numpy as np
+
 from .reflector import Reflector
 from .rotor import Rotor
 
+BUFFER_BLOCK_SIZE = 1 << 20
+
 
 class Enigma:
     def __init__(
@@ -15,6 +19,11 @@ class Enigma:
         self._right_rotor = right_rotor
         self._reflector = reflector
 
+        # Положение роторов -- чистая функция смещения в потоке,
+        # поэтому достаточно запомнить начальное положение.
+        self._origin = self._rotors_counter()
+        self._offset = 0
+
     @property
     def rotors(self) -> list[Rotor]:
         return [
@@ -27,7 +36,28 @@ class Enigma:
     def reflector(self) -> Reflector:
         return self._reflector
 
+    @property
+    def initial_positions(self) -> list[int]:
+        return [
+            (self._origin >> 16) & 0xFF,
+            (self._origin >> 8) & 0xFF,
+            self._origin & 0xFF,
+        ]
+
+    def seek(self, offset: int) -> int:
+        """Переставляет роторы в положение для байта с номером offset за O(1)"""
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+
+        self._offset = offset
+        self._set_rotors_counter(self._origin + offset)
+        return offset
+
+    def tell(self) -> int:
+        return self._offset
+
     def _turn_rotors(self) -> None:
+        self._offset += 1
         self._right_rotor.turn()
 
         if self._right_rotor.full_circle_is_done():
@@ -52,3 +82,63 @@ class Enigma:
         letter_res = letter_rb
 
         return letter_res
+
+    def encrypt_buffer(self, data: bytes) -> bytes:
+        """
+        Шифрует весь буфер сразу, без цикла по байтам.
+        Положения роторов для i-го байта -- это цифры числа (start + i + 1)
+        в системе счисления по основанию 256, где start -- текущее
+        положение роторов. Результат совпадает с encrypt, примененным
+        к каждому байту по очереди.
+        """
+        src = np.frombuffer(data, dtype=np.uint8)
+        res = np.empty_like(src)
+        self._encrypt_array(src, res)
+        return res.tobytes()
+
+    def encrypt_into(self, buffer: bytearray | memoryview) -> None:
+        """Как encrypt_buffer, но результат пишется на место исходных данных"""
+        letters = np.frombuffer(buffer, dtype=np.uint8)
+        self._encrypt_array(letters, letters)
+
+    def _encrypt_array(self, src: np.ndarray, res: np.ndarray) -> None:
+        right, mid, left = self._right_rotor, self._mid_rotor, self._left_rotor
+        wires = [np.frombuffer(r.wires, dtype=np.uint8) for r in (right, mid, left)]
+        inverse = [
+            np.frombuffer(r.inverse_wires, dtype=np.uint8) for r in (left, mid, right)
+        ]
+        reflector = np.frombuffer(self._reflector.wires, dtype=np.uint8)
+
+        counter = self._origin + self._offset
+        for begin in range(0, len(src), BUFFER_BLOCK_SIZE):
+            block = src[begin : begin + BUFFER_BLOCK_SIZE]
+            steps = np.arange(
+                counter + begin + 1, counter + begin + 1 + len(block), dtype=np.int64
+            )
+            rs = (steps & 0xFF).astype(np.uint8)
+            ms = ((steps >> 8) & 0xFF).astype(np.uint8)
+            ls = ((steps >> 16) & 0xFF).astype(np.uint8)
+
+            # Арифметика в uint8 сама берет результат по модулю 256
+            letters = block
+            for table, start in zip(wires, (rs, ms, ls)):
+                letters = table[letters + start] - start
+            letters = reflector[letters]
+            for table, start in zip(inverse, (ls, ms, rs)):
+                letters = table[letters + start] - start
+
+            res[begin : begin + len(block)] = letters
+
+        self.seek(self._offset + len(src))
+
+    def _rotors_counter(self) -> int:
+        return (
+            self._left_rotor.curr_start << 16
+            | self._mid_rotor.curr_start << 8
+            | self._right_rotor.curr_start
+        )
+
+    def _set_rotors_counter(self, counter: int) -> None:
+        self._right_rotor._curr_start = counter & 0xFF
+        self._mid_rotor._curr_start = (counter >> 8) & 0xFF
+        self._left_rotor._curr_start = (counter >> 16) & 0xFF
@@ -0,0 +1,86 @@
+import struct
+import zlib
+from typing import NamedTuple
+
+from .enigma import Enigma
+from .multi_rotor import MultiRotorEnigma
+from .reflector import Reflector
+from .rotor import Rotor
+
+_MAGIC = b"ENGK"
+_VERSION = 1
+_HEADER = struct.Struct(">4sBB")
+_CHECKSUM = struct.Struct(">I")
+_WIRING_SIZE = len(Rotor.POS_TO_LETTER)
+
+
+class EnigmaKey(NamedTuple):
+    """
+    Настройки Enigma в одном бинарном файле:
+    заголовок (сигнатура, версия, число роторов),
+    для каждого ротора -- начальное положение и коммутация,
+    коммутация рефлектора и CRC32 всего предыдущего.
+    """
+
+    rotors: tuple[bytes, ...]
+    positions: tuple[int, ...]
+    reflector: bytes
+
+    def __bytes__(self) -> bytes:
+        body = bytearray(_HEADER.pack(_MAGIC, _VERSION, len(self.rotors)))
+        for wiring, position in zip(self.rotors, self.positions):
+            body.append(position)
+            body += wiring
+        body += self.reflector
+        body += _CHECKSUM.pack(zlib.crc32(body))
+        return bytes(body)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "EnigmaKey":
+        view = memoryview(data)
+        magic, version, rotors_count = _HEADER.unpack_from(view)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not an Enigma key")
+
+        expected_size = (
+            _HEADER.size
+            + rotors_count * (1 + _WIRING_SIZE)
+            + _WIRING_SIZE
+            + _CHECKSUM.size
+        )
+        if len(view) != expected_size:
+            raise ValueError("Enigma key has wrong size")
+
+        (checksum,) = _CHECKSUM.unpack_from(view, len(view) - _CHECKSUM.size)
+        if zlib.crc32(view[: -_CHECKSUM.size]) != checksum:
+            raise ValueError("Enigma key checksum mismatch")
+
+        rotors: list[bytes] = []
+        positions: list[int] = []
+        offset = _HEADER.size
+        for _ in range(rotors_count):
+            positions.append(view[offset])
+            rotors.append(bytes(view[offset + 1 : offset + 1 + _WIRING_SIZE]))
+            offset += 1 + _WIRING_SIZE
+
+        reflector = bytes(view[offset : offset + _WIRING_SIZE])
+        return cls(tuple(rotors), tuple(positions), reflector)
+
+    @classmethod
+    def from_enigma(cls, enigma: Enigma | MultiRotorEnigma) -> "EnigmaKey":
+        return cls(
+            tuple(bytes(rotor) for rotor in enigma.rotors),
+            tuple(enigma.initial_positions),
+            bytes(enigma.reflector),
+        )
+
+    def make_enigma(self) -> Enigma | MultiRotorEnigma:
+        rotors = [
+            Rotor(wiring, position)
+            for wiring, position in zip(self.rotors, self.positions)
+        ]
+        reflector = Reflector(self.reflector)
+
+        if len(rotors) == 3:
+            return Enigma(*rotors, reflector)
+        return MultiRotorEnigma(rotors, reflector)
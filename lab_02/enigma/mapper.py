@@ -1,31 +1,48 @@
 class Mapper:
+    __slots__ = ("_letters", "_wires", "_inverse")
+
     POS_TO_LETTER: bytes = bytes([i for i in range(256)])
     LETTER_TO_POS: dict[bytes, int] = {
         letter: pos for pos, letter in enumerate(POS_TO_LETTER)
     }
 
     def __init__(self, letters: bytes) -> None:
-        self._letters: bytes = letters
-        self._wires: list[int] = [
+        self._letters: bytes = bytes(letters)
+        self._wires: bytes = bytes(
             self.letter_to_pos(letter) for letter in self._letters
-        ]
+        )
+
+        # Обратная коммутация: _inverse[_wires[pos]] == pos.
+        # Строится один раз, чтобы обратный проход был O(1), а не поиском.
+        inverse = bytearray(len(self._wires))
+        for pos, wire in enumerate(self._wires):
+            inverse[wire] = pos
+        self._inverse: bytes = bytes(inverse)
 
     @classmethod
     def letter_to_pos(cls, letter: int) -> int:
         if isinstance(letter, str):
-            letter = bytes([ord(letter)])
-        return cls.POS_TO_LETTER.find(letter)
+            letter = ord(letter)
+        return cls.LETTER_TO_POS[letter]
 
     @classmethod
     def pos_to_letter(cls, pos: int) -> int:
         return cls.POS_TO_LETTER[pos]
 
+    @property
+    def wires(self) -> bytes:
+        return self._wires
+
+    @property
+    def inverse_wires(self) -> bytes:
+        return self._inverse
+
     def straight(self, letter: int) -> int:
         input_number = self.letter_to_pos(letter)
         return self._letters[input_number]
 
-    def back(self, letter: bytes) -> int:
-        letter_pos = self._letters.find(letter)
+    def back(self, letter: int) -> int:
+        letter_pos = self._inverse[self.letter_to_pos(letter)]
         return self.pos_to_letter(letter_pos)
 
     def __bytes__(self) -> bytes:
@@ -2,4 +2,4 @@ from .mapper import Mapper
 
 
 class Reflector(Mapper):
-    pass
+    __slots__ = ()
@@ -2,6 +2,8 @@ from .mapper import Mapper
 
 
 class Rotor(Mapper):
+    __slots__ = ("_curr_start",)
+
     def __init__(self, letters: bytes, initial_pos: int) -> None:
         super().__init__(letters)
         self._curr_start = self.letter_to_pos(initial_pos)
@@ -22,7 +24,7 @@ class Rotor(Mapper):
         pos_in: int = self.letter_to_pos(letter)
         start = self._curr_start
 
-        pos_out = self._wires.index((pos_in + start) % len(self.POS_TO_LETTER)) - start
+        pos_out = self._inverse[(pos_in + start) % len(self.POS_TO_LETTER)] - start
 
         return self.pos_to_letter(pos_out)
 
@@ -0,0 +1,91 @@
+import io
+from typing import BinaryIO
+
+from .enigma import Enigma
+from .multi_rotor import MultiRotorEnigma
+
+
+class EnigmaStream(io.RawIOBase):
+    """
+    Файловый объект поверх другого потока: все, что читается
+    из него или пишется в него, проходит через enigma.
+    Смещение enigma совпадает со смещением в потоке относительно
+    позиции, на которой поток был обернут.
+
+    readinto шифрует прямо в буфере вызывающего, write -- через
+    переиспользуемый внутренний буфер, исходные данные не меняются.
+    """
+
+    def __init__(
+        self,
+        raw: BinaryIO,
+        enigma: Enigma | MultiRotorEnigma,
+        *,
+        close_raw: bool = True,
+    ) -> None:
+        super().__init__()
+        self._raw = raw
+        self._enigma = enigma
+        self._close_raw = close_raw
+        self._base = raw.tell() if raw.seekable() else 0
+        self._scratch = bytearray()
+
+    @property
+    def raw(self) -> BinaryIO:
+        return self._raw
+
+    def readable(self) -> bool:
+        return self._raw.readable()
+
+    def writable(self) -> bool:
+        return self._raw.writable()
+
+    def seekable(self) -> bool:
+        return self._raw.seekable()
+
+    def readinto(self, buffer: bytearray | memoryview) -> int | None:
+        view = memoryview(buffer).cast("B")
+        read = self._raw.readinto(view)
+        if read:
+            self._enigma.encrypt_into(view[:read])
+        return read
+
+    def write(self, data: bytes | bytearray | memoryview) -> int | None:
+        view = memoryview(data).cast("B")
+        size = len(view)
+        if len(self._scratch) < size:
+            self._scratch = bytearray(size)
+
+        scratch = memoryview(self._scratch)[:size]
+        scratch[:] = view
+        start = self._enigma.tell()
+        self._enigma.encrypt_into(scratch)
+
+        written = self._raw.write(scratch)
+        if written != size:
+            # Незаписанный хвост будет передан повторно,
+            # поэтому роторы откатываются на записанное количество
+            self._enigma.seek(start + (written or 0))
+        return written
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        pos = self._raw.seek(offset, whence)
+        self._enigma.seek(pos - self._base)
+        return pos
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+    def flush(self) -> None:
+        if not self.closed:
+            self._raw.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        try:
+            super().close()
+        finally:
+            if self._close_raw:
+                self._raw.close()
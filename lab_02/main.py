@@ -1,15 +1,58 @@
+import time
+
 import click
 
-from enigma import Enigma
+from batch import IO_THREADS, collect_batch_files, encrypt_batch
+from enigma import Enigma, MultiRotorEnigma
 from misc import (
+    CHUNK_SIZE,
+    encrypt_file_parallel,
+    encrypt_file_streaming,
+    load_key,
     make_enigma_from_settings,
     make_new_rand_enigma,
-    read_file,
-    write_file,
-    write_settings_file,
+    save_key,
+    write_key_file,
 )
 
 
+def run_batch(
+    pattern: str, use_settings: bool, key_path: str, io_threads: int, rotors: int
+) -> None:
+    paths = collect_batch_files(pattern)
+    if not paths:
+        click.secho("Не удалось найти файлы", fg="red", bold=True)
+        return
+
+    enigma: Enigma | MultiRotorEnigma
+    if use_settings:
+        try:
+            enigma = load_key(key_path).make_enigma()
+        except FileNotFoundError:
+            click.secho("Не удалось найти файл ключа", fg="red", bold=True)
+            return
+    else:
+        enigma = make_new_rand_enigma(rotors)
+        save_key(key_path, enigma)
+
+    t1 = time.perf_counter()
+    results = encrypt_batch(enigma, paths, io_threads)
+    t2 = time.perf_counter()
+
+    for result in results:
+        click.echo(
+            f"{result.path}: {result.size / 1e6:.3f} MB, {result.mb_per_sec:.2f} MB/s"
+        )
+
+    total_size = sum(result.size for result in results)
+    click.secho(
+        f"Всего: {len(results)} файлов, {total_size / 1e6:.3f} MB, "
+        f"{total_size / 1e6 / (t2 - t1):.2f} MB/s",
+        fg="yellow",
+    )
+    click.secho("Успешно зашифровано!", fg="green", bold=True)
+
+
 @click.command()
 @click.option(
     "-file_path",
@@ -22,26 +65,82 @@ from misc import (
     default=False,
     help="Получить сохраненные настройки",
 )
-def run(file_path: str | None, use_settings: str | None) -> None:
-    if use_settings and not file_path:
-        click.secho("Используется только вместе в -file_path", fg="red", bold=True)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Количество процессов для шифрования",
+)
+@click.option(
+    "--chunk_size",
+    type=click.IntRange(min=1),
+    default=CHUNK_SIZE,
+    show_default=True,
+    help="Размер куска при потоковом шифровании, байт",
+)
+@click.option(
+    "--batch",
+    default=None,
+    help="Зашифровать все файлы каталога или по маске",
+)
+@click.option(
+    "--key_path",
+    default="batch__key.bin",
+    show_default=True,
+    help="Файл ключа для --batch",
+)
+@click.option(
+    "--io_threads",
+    type=click.IntRange(min=1),
+    default=IO_THREADS,
+    show_default=True,
+    help="Количество потоков чтения и записи для --batch",
+)
+@click.option(
+    "--rotors",
+    type=click.IntRange(min=1),
+    default=3,
+    show_default=True,
+    help="Количество роторов в новых настройках",
+)
+def run(
+    file_path: str | None,
+    use_settings: str | None,
+    jobs: int,
+    chunk_size: int,
+    batch: str | None,
+    key_path: str,
+    io_threads: int,
+    rotors: int,
+) -> None:
+    if use_settings and not (file_path or batch):
+        click.secho(
+            "Используется только вместе в -file_path или --batch", fg="red", bold=True
+        )
+        return
+
+    if batch:
+        run_batch(batch, use_settings, key_path, io_threads, rotors)
         return
 
-    enigma: Enigma
+    enigma: Enigma | MultiRotorEnigma
     if use_settings:
         enigma = make_enigma_from_settings(file_path)
     else:
-        enigma = make_new_rand_enigma()
+        enigma = make_new_rand_enigma(rotors)
 
-    write_settings_file(file_path, enigma.rotors, enigma.reflector)
+    write_key_file(file_path, enigma)
+    cipher_path = f"{file_path}__cipher.txt"
 
     try:
-        file_data: bytes = read_file(path=file_path, mode="rb")
+        if jobs > 1:
+            encrypt_file_parallel(file_path, cipher_path, jobs)
+        else:
+            encrypt_file_streaming(enigma, file_path, cipher_path, chunk_size)
     except FileNotFoundError:
         click.secho("Не удалось найти файл", fg="red", bold=True)
     else:
-        cipher_text = b"".join([bytes([enigma.encrypt(letter)]) for letter in file_data])
-        write_file(path=f"{file_path}__cipher.txt", data=cipher_text, mode="wb")
         click.secho("Успешно зашифровано!", fg="green", bold=True)
 
 
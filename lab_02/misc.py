@@ -1,6 +1,21 @@
+import functools
+import os
 import random
+from math import ceil
+from multiprocessing import Pool
 
-from enigma import Enigma, Reflector, Rotor
+from enigma import (
+    Enigma,
+    EnigmaKey,
+    EnigmaStream,
+    MultiRotorEnigma,
+    Reflector,
+    Rotor,
+)
+
+SEGMENT_SIZE = 64 << 20
+CHUNK_SIZE = 1 << 20
+KEY_CACHE_SIZE = 128
 
 
 def read_file(path: str, mode: str = "r") -> str | bytes:
@@ -13,7 +28,66 @@ def write_file(path: str, data: str | bytes, mode: str = "w") -> None:
         f.write(data)
 
 
-def make_enigma_from_settings(file_path: str) -> Enigma:
+def encrypt_file_streaming(
+    enigma: Enigma | MultiRotorEnigma,
+    file_path: str,
+    cipher_path: str,
+    chunk_size: int = CHUNK_SIZE,
+) -> None:
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+
+    with (
+        EnigmaStream(open(f"./data/{file_path}", "rb", buffering=0), enigma) as reader,
+        open(f"./data/{cipher_path}", "wb") as writer,
+    ):
+        # Положение роторов переходит от куска к куску внутри enigma,
+        # каждый кусок шифруется на месте в одном и том же буфере
+        while read := reader.readinto(buffer):
+            writer.write(view[:read])
+
+
+def encrypt_segment(file_path: str, cipher_path: str, begin: int, end: int) -> None:
+    enigma = make_enigma_from_settings(file_path)
+    enigma.seek(begin)
+
+    with open(f"./data/{file_path}", "rb") as f:
+        f.seek(begin)
+        data = f.read(end - begin)
+
+    with open(f"./data/{cipher_path}", "r+b") as f:
+        f.seek(begin)
+        f.write(enigma.encrypt_buffer(data))
+
+
+def encrypt_file_parallel(file_path: str, cipher_path: str, jobs: int) -> None:
+    size = os.path.getsize(f"./data/{file_path}")
+
+    # Заранее выделяем выходной файл, чтобы каждый процесс
+    # писал в свою область независимо от остальных
+    with open(f"./data/{cipher_path}", "wb") as f:
+        f.truncate(size)
+
+    segment = max(1, min(ceil(size / jobs), SEGMENT_SIZE))
+    segments = [
+        (file_path, cipher_path, begin, min(begin + segment, size))
+        for begin in range(0, size, segment)
+    ]
+
+    with Pool(processes=jobs) as pool:
+        pool.starmap(encrypt_segment, segments, chunksize=1)
+
+
+def make_enigma_from_settings(file_path: str) -> Enigma | MultiRotorEnigma:
+    try:
+        key = read_key_file(file_path)
+    except FileNotFoundError:
+        return make_enigma_from_legacy_settings(file_path)
+
+    return key.make_enigma()
+
+
+def make_enigma_from_legacy_settings(file_path: str) -> Enigma:
     rotors_data: list[str | bytes] = []
 
     for idx in range(3):
@@ -34,16 +108,19 @@ def make_enigma_from_settings(file_path: str) -> Enigma:
     )
 
 
-def make_new_rand_enigma():
+def make_new_rand_enigma(rotors_count: int = 3) -> Enigma | MultiRotorEnigma:
     letters_mutable = bytearray(Rotor.POS_TO_LETTER)
     rotors = []
-    for _ in range(3):
+    for _ in range(rotors_count):
         random.shuffle(letters_mutable)
         rotors.append(Rotor(letters_mutable.copy(), 0))
 
     random.shuffle(letters_mutable)
     reflector = Reflector(bytearray(reversed(Rotor.POS_TO_LETTER)))
 
+    if rotors_count != 3:
+        return MultiRotorEnigma(rotors, reflector)
+
     return Enigma(
         rotors[0],
         rotors[1],
@@ -56,12 +133,31 @@ def make_settings_filename(file_path: str, slug: str | int) -> str:
     return f"{file_path}__settings_{slug}.txt"
 
 
-def write_settings_file(
-    file_path: str, rotors: list[Rotor], reflector: Reflector
-) -> None:
-    for idx, rotor in enumerate(rotors):
-        filename = make_settings_filename(file_path, f"rotor_{idx}")
-        write_file(filename, bytes(rotor), "wb")
+def make_key_filename(file_path: str) -> str:
+    return f"{file_path}__key.bin"
 
-    filename = make_settings_filename(file_path, "reflector")
-    write_file(filename, bytes(reflector), "wb")
+
+def write_key_file(file_path: str, enigma: Enigma) -> None:
+    write_file(make_key_filename(file_path), bytes(EnigmaKey.from_enigma(enigma)), "wb")
+
+
+def read_key_file(file_path: str) -> EnigmaKey:
+    return load_key(f"./data/{make_key_filename(file_path)}")
+
+
+def load_key(path: str) -> EnigmaKey:
+    stat = os.stat(path)
+    return _load_key(path, stat.st_mtime_ns, stat.st_size)
+
+
+def save_key(path: str, enigma: Enigma) -> None:
+    with open(path, "wb") as f:
+        f.write(bytes(EnigmaKey.from_enigma(enigma)))
+
+
+@functools.lru_cache(maxsize=KEY_CACHE_SIZE)
+def _load_key(path: str, mtime_ns: int, size: int) -> EnigmaKey:
+    # mtime и размер входят в ключ кэша, чтобы перезаписанный
+    # файл ключа не отдавался из кэша
+    with open(path, "rb") as f:
+        return EnigmaKey.from_bytes(f.read())
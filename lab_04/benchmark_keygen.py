@@ -0,0 +1,85 @@
+import io
+import json
+import platform
+import statistics
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+import click
+
+from custom_rsa.keygen import KeyGenRSA
+from custom_rsa.pool import configure_pool
+
+DEFAULT_BITS = "1024,2048,4096"
+
+
+@click.command()
+@click.option(
+    "--bits",
+    default=DEFAULT_BITS,
+    show_default=True,
+    help="Key sizes (bits of n), comma separated.",
+)
+@click.option(
+    "--repeat", type=click.IntRange(min=1), default=3, show_default=True
+)
+@click.option(
+    "--processes",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Processes for the parallel prime search.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write results as JSON.",
+)
+def run(bits: str, repeat: int, processes: int, output: str | None) -> None:
+    results = []
+    # Поиск простых идет в общем пуле, он создается один раз
+    configure_pool(processes)
+
+    for nbits in map(int, bits.split(",")):
+        times: list[float] = []
+        for _ in range(repeat):
+            keygen = KeyGenRSA(nbits, processes=processes)
+            # Сообщения генератора не должны попадать в замер
+            with redirect_stdout(io.StringIO()):
+                t1 = time.perf_counter()
+                keygen.generate_new()
+                t2 = time.perf_counter()
+            times.append(t2 - t1)
+
+        result = {
+            "bits": nbits,
+            "processes": processes,
+            "min_s": min(times),
+            "median_s": statistics.median(times),
+            "max_s": max(times),
+        }
+        results.append(result)
+        click.secho(
+            f"{nbits} bits: min {result['min_s']:.3f} s, "
+            f"median {result['median_s']:.3f} s, max {result['max_s']:.3f} s",
+            fg="yellow",
+        )
+
+    if output:
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": repeat,
+            },
+            "results": results,
+        }
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    run()
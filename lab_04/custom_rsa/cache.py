@@ -0,0 +1,106 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from .calculations import pow_in_executor
+from .modexp import PowFunc
+from .profiling import count
+from .serialization import ints_to_bytes
+
+BYTE_VALUES = 256
+TABLE_CACHE_SIZE = 8
+POW_CACHE_SIZE = 1 << 16
+POW_CACHES_LIMIT = 8
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def power_table(b: int, c: int) -> tuple[int, ...]:
+    """x^b mod c for every byte value x"""
+    return tuple(pow_in_executor(range(BYTE_VALUES), b, c))
+
+
+def pow_bytes(data: bytes, b: int, c: int) -> list[int]:
+    """Per-byte x^b mod c as a lookup into power_table"""
+    return list(map(power_table(b, c).__getitem__, data))
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def serialized_power_table(b: int, c: int, width: int) -> np.ndarray:
+    """power_table as a read-only (BYTE_VALUES, width) array of bytes"""
+    table = ints_to_bytes(power_table(b, c), width)
+    return np.frombuffer(table, dtype=np.uint8).reshape(BYTE_VALUES, width)
+
+
+def pow_bytes_serialized(data: bytes, b: int, c: int, width: int) -> bytes:
+    """
+    pow_bytes serialized to width bytes per value: one numpy lookup,
+    no Python int per input byte
+    """
+    count("serialized_bytes", len(data) * width)
+    table = serialized_power_table(b, c, width)
+    return table[np.frombuffer(data, dtype=np.uint8)].tobytes()
+
+
+class PowCache:
+    """Bounded LRU of x -> x^b mod c for one (b, c) pair"""
+
+    def __init__(
+        self,
+        b: int,
+        c: int,
+        pow_func: PowFunc | None = None,
+        maxsize: int = POW_CACHE_SIZE,
+    ) -> None:
+        self._b = b
+        self._c = c
+        self._pow_func = pow_func
+        self._maxsize = maxsize
+        self._cache: OrderedDict[int, int] = OrderedDict()
+
+    def __call__(self, data: list[int]) -> list[int]:
+        cache = self._cache
+
+        known: dict[int, int] = {}
+        missing: list[int] = []
+        for x in set(data):
+            if x in cache:
+                cache.move_to_end(x)
+                known[x] = cache[x]
+            else:
+                missing.append(x)
+
+        computed = pow_in_executor(
+            missing, self._b, self._c, pow_func=self._pow_func
+        )
+        known.update(zip(missing, computed))
+
+        cache.update(zip(missing, computed))
+        while len(cache) > self._maxsize:
+            cache.popitem(last=False)
+
+        return list(map(known.__getitem__, data))
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+_pow_caches: OrderedDict[tuple[int, int], PowCache] = OrderedDict()
+
+
+def get_pow_cache(b: int, c: int, pow_func: PowFunc | None = None) -> PowCache:
+    key = (b, c)
+    if key in _pow_caches:
+        _pow_caches.move_to_end(key)
+        return _pow_caches[key]
+
+    cache = _pow_caches[key] = PowCache(b, c, pow_func)
+    while len(_pow_caches) > POW_CACHES_LIMIT:
+        _pow_caches.popitem(last=False)
+    return cache
+
+
+def clear_power_caches() -> None:
+    power_table.cache_clear()
+    serialized_power_table.cache_clear()
+    _pow_caches.clear()
@@ -1,63 +1,57 @@
 import hashlib
 import itertools
-from collections.abc import Callable, Iterable, Sequence
-from multiprocessing import Pool
+from collections.abc import Iterable, Sequence
 
-NUM_THREADS = 10
+from .modexp import PowFunc, select_engine
+from .pool import chunk_size, get_pool, should_parallelize
+from .profiling import count, merge_worker_stats, profiled, worker_func
 
 
-def power_log_n(x: int, y: int, p: int) -> int:
-    res = 1  # Initialize result
+def crt_power(
+    x: int, d: int, n: int, *, p: int, q: int, dp: int, dq: int, q_inv: int
+) -> int:
+    """
+    x^d mod n by the Chinese Remainder Theorem:
+    two half-size exponentiations mod p and mod q + Garner's recombination.
+    d and n are accepted to keep the pow_func signature.
+    The halves use the modexp engine selected for (dp, p) and (dq, q).
+    """
+    m1 = select_engine(dp, p)(x, dp, p)
+    m2 = select_engine(dq, q)(x, dq, q)
+    h = (q_inv * (m1 - m2)) % p
+    return m2 + h * q
 
-    # Update x if it is more
-    # than or equal to p
-    x = x % p
 
-    if x == 0:
-        return 0
-
-    while y > 0:
-
-        # If y is odd, multiply
-        # x with result
-        if (y & 1) == 1:
-            res = (res * x) % p
-
-        # y must be even now
-        y = y >> 1  # y = y/2
-        x = (x * x) % p
-
-    return res
-
-
-def split_to_parallel(data: Sequence, num: int = NUM_THREADS) -> Iterable:
+def split_to_parallel(data: Sequence, num: int) -> Iterable:
     for i in range(0, len(data), num):
         yield data[i : i + num]
 
 
-def pow_list(
-    data: list[int], b: int, c: int, pow_func: Callable[[int, int, int], int]
-) -> list[int]:
+@profiled("pow_list")
+def pow_list(data: list[int], b: int, c: int, pow_func: PowFunc) -> list[int]:
+    count("modexp_calls", len(data))
     return [pow_func(x, b, c) for x in data]
 
 
+@profiled("modexp")
 def pow_in_executor(
-    data: list[int] | bytes,
-    b: int,
-    c: int,
-    *,
-    num: int = NUM_THREADS,
-    pow_func: Callable[[int, int, int], int] = pow
+    data: list[int] | bytes, b: int, c: int, *, pow_func: PowFunc | None = None
 ) -> list[int]:
-    with Pool(processes=num) as pool:
-        results = pool.starmap(
-            pow_list,
-            [
-                (chunk, b, c, pow_func)
-                for chunk in split_to_parallel(data, len(data) // num + 1)
-            ],
-        )
-    return list(itertools.chain.from_iterable(results))
+    """pow_func None means the modexp engine selected for (b, c)"""
+    if pow_func is None:
+        pow_func = select_engine(b, c)
+
+    if not should_parallelize(len(data)):
+        return pow_list(data, b, c, pow_func)
+
+    results = get_pool().starmap(
+        worker_func(pow_list),
+        [
+            (chunk, b, c, pow_func)
+            for chunk in split_to_parallel(data, chunk_size(len(data)))
+        ],
+    )
+    return list(itertools.chain.from_iterable(map(merge_worker_stats, results)))
 
 
 def hasher(data: bytes) -> bytes:
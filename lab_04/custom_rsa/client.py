@@ -1,7 +1,14 @@
 import click
 
 from .keygen import PublicKey
+from .cache import pow_bytes
 from .calculations import hasher, pow_in_executor
+from .hybrid import encrypt_file as encrypt_hybrid_file
+from .hybrid import SESSION_KEY_SIZE, new_session_key
+from .keyring import fingerprint
+from .misc import convert_to_bytes, pack_blocks, plain_block_size
+from .pipeline import cipher_width, encrypt_file, hash_file
+from .signing import verify_digest, verify_files
 
 
 class Client:
@@ -11,21 +18,84 @@ class Client:
     def encrypt(self, data: bytes) -> list[int]:
         click.secho("Encrypting...", fg="green")
 
-        n, e = self._public_key
-        res = pow_in_executor(data, e, n)
+        n, e = self._public_key.n, self._public_key.e
+        res = pow_bytes(data, e, n)
 
         click.secho("Encrypted.", fg="green")
         return res
 
+    def encrypt_blocks(self, data: bytes) -> list[int]:
+        click.secho("Encrypting...", fg="green")
+
+        n, e = self._public_key.n, self._public_key.e
+        blocks = pack_blocks(data, plain_block_size(n))
+        res = pow_in_executor(blocks, e, n)
+
+        click.secho("Encrypted.", fg="green")
+        return res
+
+    def encrypt_file(self, src: str, dst: str, *, block: bool = False) -> None:
+        click.secho("Encrypting...", fg="green")
+        encrypt_file(self._public_key, src, dst, block=block)
+        click.secho("Encrypted.", fg="green")
+
+    def encrypt_hybrid_file(self, src: str, dst: str) -> None:
+        """
+        Only a random session key goes through RSA,
+        the file itself is encrypted with AES-256-GCM.
+        Raises ValueError if a block under n is shorter than the session
+        key: the wrap then encrypts small pieces of the key that anyone
+        can recover by encrypting every possible piece with the public key.
+        """
+        n = self._public_key.n
+        if plain_block_size(n) < SESSION_KEY_SIZE:
+            raise ValueError(
+                f"{n.bit_length()}-bit key would wrap the session key in "
+                "pieces that can be recovered with the public key, "
+                f"use a key of more than {SESSION_KEY_SIZE * 8} bits "
+                "(--new_key --bits 512)"
+            )
+
+        session_key = new_session_key()
+        wrapped = self.encrypt_blocks(session_key)
+
+        click.secho("Encrypting payload...", fg="green")
+        encrypt_hybrid_file(
+            session_key,
+            fingerprint(self._public_key),
+            convert_to_bytes(wrapped, cipher_width(self._public_key.n)),
+            src,
+            dst,
+        )
+        click.secho("Encrypted payload.", fg="green")
+
     def verify(self, data: bytes, signed: list[int]) -> bool:
+        return self.verify_digest(hasher(data), signed)
+
+    def verify_file(self, path: str, signed: list[int]) -> bool:
+        return self.verify_digest(hash_file(path), signed)
+
+    def verify_digest(self, hashed: bytes, signed: list[int]) -> bool:
         click.secho("Verifying...", fg="green")
+        verified = verify_digest(self._public_key, hashed, signed)
+        self._report(verified)
+        return verified
 
-        n, u = self._public_key
-        hash_original = bytes(pow_in_executor(signed, u, n))
+    def verify_files(
+        self, paths: list[str], signed: list[list[int]]
+    ) -> list[bool]:
+        click.secho("Verifying...", fg="green")
 
-        if hasher(data) == hash_original:
-            click.secho("Verified.", fg="green")
-            return True
+        verified = verify_files(self._public_key, paths, signed)
 
-        click.secho("Not verified.", fg="red")
-        return False
+        for path, result in zip(paths, verified):
+            click.echo(f"{path}: {'verified' if result else 'not verified'}")
+        self._report(all(verified))
+        return verified
+
+    @staticmethod
+    def _report(verified: bool) -> None:
+        if verified:
+            click.secho("Verified.", fg="green")
+        else:
+            click.secho("Not verified.", fg="red")
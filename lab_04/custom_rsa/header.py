@@ -0,0 +1,90 @@
+import struct
+from math import ceil
+from typing import NamedTuple
+
+from .keyring import KEY_ID_SIZE
+
+CIPHER_MAGIC = b"RSAC"
+CIPHER_VERSION = 2
+
+_FLAG_BLOCK = 1
+_PREFIX = struct.Struct(">4sB")
+_HEADERS = {
+    # сигнатура, версия, флаги, id ключа
+    1: struct.Struct(f">4sBB{KEY_ID_SIZE}s"),
+    # + ширина блока, байт открытого текста в блоке, длина текста, число блоков
+    2: struct.Struct(f">4sBB{KEY_ID_SIZE}sHHQQ"),
+}
+MAX_HEADER_SIZE = max(header.size for header in _HEADERS.values())
+
+
+class CipherHeader(NamedTuple):
+    """
+    Заголовок файла шифротекста. Блоки фиксированной ширины,
+    поэтому блок с байтом открытого текста i находится по смещению
+    size + (i // plain_size) * width. В заголовках версии 1 есть
+    только флаги и id ключа, длина текста хранится в последних блоках.
+    """
+
+    key_id: bytes
+    block: bool
+    width: int = 0
+    plain_size: int = 0
+    length: int | None = None
+    blocks: int | None = None
+    version: int = CIPHER_VERSION
+
+    @classmethod
+    def for_data(
+        cls, key_id: bytes, block: bool, width: int, plain_size: int
+    ) -> "CipherHeader":
+        """Header before the data is written, see with_length"""
+        return cls(key_id, block, width, plain_size, 0, 0)
+
+    def with_length(self, length: int) -> "CipherHeader":
+        return self._replace(
+            length=length, blocks=ceil(length / self.plain_size)
+        )
+
+    @property
+    def size(self) -> int:
+        return _HEADERS[self.version].size
+
+    @property
+    def seekable(self) -> bool:
+        return self.length is not None
+
+    def __bytes__(self) -> bytes:
+        flags = _FLAG_BLOCK if self.block else 0
+        fields = (CIPHER_MAGIC, self.version, flags, self.key_id)
+        if self.version >= 2:
+            fields += (self.width, self.plain_size, self.length, self.blocks)
+        return _HEADERS[self.version].pack(*fields)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CipherHeader":
+        if len(data) < _PREFIX.size:
+            raise ValueError("Ciphertext header is too short")
+
+        magic, version = _PREFIX.unpack_from(data)
+        if magic != CIPHER_MAGIC:
+            raise ValueError("Not an RSA ciphertext")
+        if version not in _HEADERS:
+            raise ValueError(f"Unsupported ciphertext version {version}")
+
+        header = _HEADERS[version]
+        if len(data) < header.size:
+            raise ValueError("Ciphertext header is too short")
+
+        _, _, flags, key_id, *fields = header.unpack_from(data)
+        return cls(key_id, bool(flags & _FLAG_BLOCK), *fields, version=version)
+
+
+def read_header(path: str) -> CipherHeader | None:
+    """Header of the ciphertext file, None for files without one"""
+    with open(path, "rb") as f:
+        data = f.read(MAX_HEADER_SIZE)
+
+    if not data.startswith(CIPHER_MAGIC):
+        return None
+    return CipherHeader.from_bytes(data)
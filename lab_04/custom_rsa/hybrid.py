@@ -0,0 +1,139 @@
+import os
+import struct
+from typing import NamedTuple
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+
+from .keyring import KEY_ID_SIZE
+from .pipeline import read_chunks
+from .profiling import count, profiled, span
+
+HYBRID_MAGIC = b"RSAH"
+HYBRID_VERSION = 1
+
+CIPHER_AES_256_GCM = 1
+SESSION_KEY_SIZE = 32
+NONCE_SIZE = 12
+TAG_SIZE = 16
+HYBRID_CHUNK_SIZE = 1 << 20
+
+_HEADER = struct.Struct(f">4sBB{KEY_ID_SIZE}s{NONCE_SIZE}sI")
+
+
+class HybridHeader(NamedTuple):
+    """
+    Заголовок гибридного контейнера: сигнатура, версия, шифр,
+    id ключа RSA, nonce и размер обернутого ключа сессии.
+    Следом идут обернутый ключ, шифротекст и тег GCM.
+    Весь заголовок вместе с обернутым ключом входит в тег как
+    дополнительные данные.
+    """
+
+    key_id: bytes
+    nonce: bytes
+    wrapped_key: bytes
+    cipher: int = CIPHER_AES_256_GCM
+
+    def __bytes__(self) -> bytes:
+        header = _HEADER.pack(
+            HYBRID_MAGIC,
+            HYBRID_VERSION,
+            self.cipher,
+            self.key_id,
+            self.nonce,
+            len(self.wrapped_key),
+        )
+        return header + self.wrapped_key
+
+    @property
+    def size(self) -> int:
+        return _HEADER.size + len(self.wrapped_key)
+
+
+def new_session_key() -> bytes:
+    return get_random_bytes(SESSION_KEY_SIZE)
+
+
+def is_hybrid(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(HYBRID_MAGIC)) == HYBRID_MAGIC
+
+
+def read_hybrid_header(path: str) -> HybridHeader:
+    with open(path, "rb") as f:
+        data = f.read(_HEADER.size)
+        if len(data) < _HEADER.size:
+            raise ValueError("Hybrid header is too short")
+
+        magic, version, cipher, key_id, nonce, wrapped_size = _HEADER.unpack(
+            data
+        )
+        if magic != HYBRID_MAGIC:
+            raise ValueError("Not a hybrid RSA container")
+        if version != HYBRID_VERSION:
+            raise ValueError(f"Unsupported hybrid version {version}")
+        if cipher != CIPHER_AES_256_GCM:
+            raise ValueError(f"Unsupported hybrid cipher {cipher}")
+
+        wrapped_key = f.read(wrapped_size)
+        if len(wrapped_key) != wrapped_size:
+            raise ValueError("Hybrid container is truncated")
+
+    return HybridHeader(key_id, nonce, wrapped_key, cipher)
+
+
+@profiled("hybrid_encrypt")
+def encrypt_file(
+    session_key: bytes, key_id: bytes, wrapped_key: bytes, src: str, dst: str
+) -> None:
+    """Streams src through AES-256-GCM under session_key"""
+    header = HybridHeader(key_id, get_random_bytes(NONCE_SIZE), wrapped_key)
+    cipher = _make_cipher(session_key, header)
+
+    with open(dst, "wb") as f:
+        f.write(bytes(header))
+        for chunk in read_chunks(src, HYBRID_CHUNK_SIZE):
+            with span("cipher"):
+                chunk = cipher.encrypt(chunk)
+            with span("write"):
+                f.write(chunk)
+            count("bytes_written", len(chunk))
+        f.write(cipher.digest())
+
+
+@profiled("hybrid_decrypt")
+def decrypt_file(
+    session_key: bytes, header: HybridHeader, src: str, dst: str
+) -> None:
+    """
+    Streams the payload back. The tag is checked at the end,
+    on mismatch dst is removed and ValueError is raised.
+    """
+    cipher = _make_cipher(session_key, header)
+    payload_size = os.path.getsize(src) - header.size - TAG_SIZE
+    if payload_size < 0:
+        raise ValueError("Hybrid container is truncated")
+
+    with open(src, "rb") as f_src, open(dst, "wb") as f_dst:
+        f_src.seek(header.size)
+        left = payload_size
+        while left:
+            chunk = f_src.read(min(HYBRID_CHUNK_SIZE, left))
+            left -= len(chunk)
+            f_dst.write(cipher.decrypt(chunk))
+        tag = f_src.read(TAG_SIZE)
+
+    try:
+        cipher.verify(tag)
+    except ValueError:
+        os.remove(dst)
+        raise ValueError("Hybrid container authentication failed") from None
+
+
+def _make_cipher(session_key: bytes, header: HybridHeader):
+    cipher = AES.new(
+        session_key, AES.MODE_GCM, nonce=header.nonce, mac_len=TAG_SIZE
+    )
+    cipher.update(bytes(header))
+    return cipher
@@ -1,18 +1,55 @@
-import math
-from random import randint, randrange
+from collections.abc import Callable
+from functools import lru_cache, partial
+from random import randint
 from typing import NamedTuple
 
 import click
 
 from base64 import b64decode, b64encode
 
+from .cache import clear_power_caches
+from .calculations import crt_power
+from .modexp import auto_pow
+from .names import FAST_PUBLIC_PROFILE, LEGACY_RANDOM_PROFILE, PROFILES
+from .primes import random_prime_parallel
+from .profiling import profiled
+
+# Малый фиксированный e: возведение в степень -- 17 умножений
+FAST_PUBLIC_EXPONENT = 65537
+
 
 class PrivateKey(NamedTuple):
     n: int
     d: int
+    # Параметры для КТО (китайской теоремы об остатках).
+    # В ключах старого формата их нет.
+    p: int | None = None
+    q: int | None = None
+    dp: int | None = None
+    dq: int | None = None
+    q_inv: int | None = None
+
+    @property
+    def has_crt(self) -> bool:
+        return self.p is not None
+
+    @property
+    def crt_params(self) -> dict[str, int]:
+        return {
+            "p": self.p,
+            "q": self.q,
+            "dp": self.dp,
+            "dq": self.dq,
+            "q_inv": self.q_inv,
+        }
+
+    @property
+    def pow_func(self) -> Callable[[int, int, int], int]:
+        return _make_pow_func(self)
 
     def __bytes__(self) -> bytes:
-        return b64encode(f"{self.n};{self.d}".encode())
+        fields = self if self.has_crt else self[:2]
+        return b64encode(";".join(map(str, fields)).encode())
 
     @classmethod
     def from_bytes(cls, data: bytes) -> "PrivateKey":
@@ -21,40 +58,54 @@ class PrivateKey(NamedTuple):
         )
 
 
+@lru_cache(maxsize=None)
+def _make_pow_func(key: PrivateKey) -> Callable[[int, int, int], int]:
+    if key.has_crt:
+        return partial(crt_power, **key.crt_params)
+    return auto_pow
+
+
 class PublicKey(NamedTuple):
     n: int
     e: int
+    # Ключи старого формата профиля не содержат: у них случайный e
+    profile: str = LEGACY_RANDOM_PROFILE
 
     def __bytes__(self) -> bytes:
-        return b64encode(f"{self.n};{self.e}".encode())
+        fields = [str(self.n), str(self.e)]
+        if self.profile != LEGACY_RANDOM_PROFILE:
+            fields.append(self.profile)
+        return b64encode(";".join(fields).encode())
 
     @classmethod
     def from_bytes(cls, data: bytes) -> "PublicKey":
-        return PublicKey(
-            *tuple(map(int, b64decode(data).decode().strip().split(";")))
-        )
+        n, e, *profile = b64decode(data).decode().strip().split(";")
+        return PublicKey(int(n), int(e), *profile)
 
 
 class KeyGenRSA:
     _PUBLIC_KEY_NAME = ".rsa/public.key"
     _PRIVATE_KEY_NAME = ".rsa/private.key"
 
-    def __init__(self, nbits: int = 16) -> None:
+    def __init__(
+        self,
+        nbits: int = 16,
+        processes: int = 1,
+        profile: str = FAST_PUBLIC_PROFILE,
+    ) -> None:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown key profile {profile}")
+
+        self._profile = profile
         self._p = None
         self._q = None
         self._public = None
         self._private = None
-        self._p_q_bits = nbits // 2
-
-        if nbits <= 32:
-            prime_numbers = self._collect_primes(limit=256)
-            dummy_gen = True
-        else:
-            prime_numbers = self._collect_primes(limit=1024)
-            dummy_gen = False
-
-        self.__prime_numbers = prime_numbers
-        self.__is_dummy_gen = dummy_gen
+        # У простых старшие два бита единичные, поэтому в n ровно nbits бит
+        self._p_bits = nbits // 2
+        self._q_bits = nbits - self._p_bits
+        # Окон поиска простых за раз в общем пуле, 1 -- без пула
+        self._processes = processes
 
     @property
     def public(self) -> PublicKey:
@@ -64,6 +115,7 @@ class KeyGenRSA:
     def private(self) -> PrivateKey:
         return self._private
 
+    @profiled("keygen")
     def generate(self) -> None:
         try:
             self._load()
@@ -73,6 +125,12 @@ class KeyGenRSA:
         else:
             click.secho("Keys loaded..", fg="green")
 
+    @profiled("keygen")
+    def generate_new(self) -> None:
+        """New key pair regardless of the saved one, nothing is written"""
+        self._generate()
+
+    @profiled("load")
     def _load(self) -> None:
         with open(self._PRIVATE_KEY_NAME, "rb") as f:
             self._private = PrivateKey.from_bytes(f.read())
@@ -80,27 +138,29 @@ class KeyGenRSA:
         with open(self._PUBLIC_KEY_NAME, "rb") as f:
             self._public = PublicKey.from_bytes(f.read())
 
+    @profiled("generate")
     def _generate(self) -> None:
         click.secho("Generating keys...", fg="green")
+        clear_power_caches()
 
-        self._generate_p_and_q()
+        while True:
+            self._generate_p_and_q()
 
-        p, q = self._p, self._q
-        n = p * q
+            p, q = self._p, self._q
+            n = p * q
 
-        # Choose e such that gcd(e, phi_n) == 1.
-        # phi(n) - функция эйлера, кол-во чисел, взаимно-простых с n, и меньших n.
-        # Для простых - phi(n) = n-1, т.к. все числа взаимно-просты для n.
-        # => phi(p*q) = (p-1)*(q-1), если p и q -- взаимно-простые
+            # Choose e such that gcd(e, phi_n) == 1.
+            # phi(n) - функция эйлера, кол-во чисел, взаимно-простых с n, и меньших n.
+            # Для простых - phi(n) = n-1, т.к. все числа взаимно-просты для n.
+            # => phi(p*q) = (p-1)*(q-1), если p и q -- взаимно-простые
 
-        phi_n = (p - 1) * (q - 1)
-        # По теореме Эйлера a^phi(n) = 1 (mod n), если gcd(a, n) == 1
+            phi_n = (p - 1) * (q - 1)
+            # По теореме Эйлера a^phi(n) = 1 (mod n), если gcd(a, n) == 1
 
-        # Берем любое число от 2 до phi(n)-1, которое взаимно простое с phi(n).
-        click.secho("Generating e", fg="green")
-        e = randint(2, phi_n - 1)
-        while self._extended_euclidean_gcd(e, phi_n)[0] != 1:
-            e = randint(2, phi_n - 1)
+            click.secho("Generating e", fg="green")
+            e = self._choose_e(phi_n)
+            if e is not None:
+                break
 
         click.secho("Generating d", fg="green")
         d = self._mod_inverse(e, phi_n)
@@ -121,9 +181,38 @@ class KeyGenRSA:
 
         # d = x % phi_n
 
-        self._private, self._public = PrivateKey(n, d), PublicKey(n, e)
+        self._private = self._make_private(n, d)
+        self._public = PublicKey(n, e, self._profile)
         click.secho("Generated keys.", fg="green")
 
+    def _choose_e(self, phi_n: int) -> int | None:
+        if self._profile == FAST_PUBLIC_PROFILE:
+            # e фиксирован, поэтому при gcd(e, phi(n)) != 1 нужны другие p и q
+            e = FAST_PUBLIC_EXPONENT
+            if self._extended_euclidean_gcd(e, phi_n)[0] != 1:
+                return None
+            return e
+
+        # Берем любое число от 2 до phi(n)-1, которое взаимно простое с phi(n).
+        e = randint(2, phi_n - 1)
+        while self._extended_euclidean_gcd(e, phi_n)[0] != 1:
+            e = randint(2, phi_n - 1)
+        return e
+
+    @profiled("crt_params")
+    def _make_private(self, n: int, d: int) -> PrivateKey:
+        p, q = self._p, self._q
+
+        # x^d mod n считается как x^(d mod (p-1)) mod p и x^(d mod (q-1)) mod q,
+        # результаты склеиваются по формуле Гарнера через q^-1 mod p.
+        try:
+            q_inv = self._mod_inverse(q, p)
+        except ValueError:
+            return PrivateKey(n, d)
+
+        return PrivateKey(n, d, p, q, d % (p - 1), d % (q - 1), q_inv)
+
+    @profiled("save")
     def _save(self) -> None:
         click.secho("Saving keys...", fg="green")
 
@@ -136,105 +225,23 @@ class KeyGenRSA:
 
         click.secho("Saved keys...", fg="green")
 
+    @profiled("primes")
     def _generate_p_and_q(self) -> None:
         click.secho("Generating p and q...", fg="green")
 
-        p, q = self._get_prime_number(), self._get_prime_number()
+        p = self._get_prime_number(self._p_bits)
+        q = self._get_prime_number(self._q_bits)
 
         while q == p:
-            q = self._get_prime_number()
+            q = self._get_prime_number(self._q_bits)
 
         self._p = p
         self._q = q
 
         click.secho("Generated p and q.", fg="green")
 
-    def _get_prime_number(self) -> int:
-        if self.__is_dummy_gen:
-            return self._dummy_prime()
-
-        return self._optimized_prime()
-
-    def _dummy_prime(self) -> int:
-        candidate = self._get_low_level_prime()
-        print(candidate, self._is_miller_rabin_passed(candidate))
-        return candidate
-
-    def _optimized_prime(self) -> int:
-        candidate = self._get_low_level_prime()
-        while not self._is_miller_rabin_passed(candidate):
-            candidate = self._get_low_level_prime()
-
-        return candidate
-
-    def _get_low_level_prime(self) -> int:
-        while True:
-            prime_candidate = self._get_random_number()
-
-            for divisor in self.__prime_numbers:
-                if (
-                    prime_candidate % divisor == 0
-                    and divisor * divisor <= prime_candidate
-                ):
-                    break
-            # If no divisor found, return value
-            else:
-                return prime_candidate
-
-    def _get_random_number(self) -> int:
-        """
-        Returns a random number between 2^(n-1) + 1 and 2^n - 1
-        """
-        nbits = self._p_q_bits
-        return randrange(2 ** (nbits - 1) + 1, 2**nbits - 1)
-
-    def _is_miller_rabin_passed(
-        self, mrc: int, number_of_rabin_trials: int = 20
-    ) -> bool:
-        """Run 20 iterations of Rabin Miller Primality test"""
-
-        max_divisions_by_two = 0
-
-        ec = mrc - 1
-
-        while ec % 2 == 0:
-            ec >>= 1
-            max_divisions_by_two += 1
-
-        assert 2**max_divisions_by_two * ec == mrc - 1
-
-        def trial_composite(tester: int) -> bool:
-            if pow(tester, ec, mrc) == 1:
-                return False
-
-            for i in range(max_divisions_by_two):
-                if pow(tester, 2**i * ec, mrc) == mrc - 1:
-                    return False
-
-            return True
-
-        for i in range(number_of_rabin_trials):
-            round_tester = randrange(2, mrc)
-            if trial_composite(round_tester):
-                return False
-
-        return True
-
-    @staticmethod
-    def _collect_primes(limit: int = 256, from_: int = 2) -> list[int]:
-        primes = [True] * limit
-        primes[0] = primes[1] = False
-
-        res: list[int] = []
-        for i, isprime in enumerate(primes):
-            if isprime:
-                if i >= from_:
-                    res.append(i)
-
-                for n in range(i * i, limit, i):
-                    primes[n] = False
-
-        return res
+    def _get_prime_number(self, bits: int) -> int:
+        return random_prime_parallel(bits, self._processes)
 
     def _mod_inverse(self, a: int, m: int) -> int:
         """
@@ -267,10 +274,7 @@ class KeyGenRSA:
         py, qy = 0, 1
 
         while y != 0:
-            assert math.gcd(x, y) == math.gcd(a, b)
-            assert x == px * a + qx * b
-            assert y == py * a + qy * b
-
+            # Инвариант: x == px * a + qx * b, y == py * a + qy * b
             q, r = divmod(x, y)
             # x = y * q + r
             # => r = x - q * y
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import struct
+import zlib
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from typing import NamedTuple
+
+from .keygen import PrivateKey, PublicKey
+from .profiling import profiled
+
+KEYRING_PATH = ".rsa/keyring.bin"
+KEY_ID_SIZE = 8
+KEYRING_CACHE_SIZE = 4
+
+_MAGIC = b"RSAR"
+_VERSION = 1
+_HEADER = struct.Struct(">4sBI")
+_ENTRY = struct.Struct(">BB")
+_FIELD_SIZE = struct.Struct(">I")
+_CHECKSUM = struct.Struct(">I")
+_PRIVATE_FIELDS = len(PrivateKey._fields)
+
+
+@lru_cache(maxsize=None)
+def fingerprint(key: PublicKey) -> bytes:
+    """Key id: first KEY_ID_SIZE bytes of SHA-256 over n and e"""
+    hashed = hashlib.sha256()
+    for value in (key.n, key.e):
+        hashed.update(_int_to_bytes(value))
+    return hashed.digest()[:KEY_ID_SIZE]
+
+
+class KeyPair(NamedTuple):
+    public: PublicKey
+    private: PrivateKey
+
+    @property
+    def key_id(self) -> bytes:
+        return fingerprint(self.public)
+
+
+class Keyring:
+    """
+    Набор пар ключей, адресуемых по отпечатку открытого ключа.
+    Ключом по умолчанию считается последний добавленный.
+
+    Бинарный формат: заголовок (сигнатура, версия, число пар),
+    для каждой пары -- профиль, e и поля закрытого ключа
+    (длина + big-endian, у ключей без КТО только n и d), затем CRC32.
+    """
+
+    def __init__(self, pairs: Iterable[KeyPair] = ()) -> None:
+        self._pairs: dict[bytes, KeyPair] = {}
+        for pair in pairs:
+            self.add(pair)
+
+    def add(self, pair: KeyPair) -> bytes:
+        if pair.public.n != pair.private.n:
+            raise ValueError("Public and private keys have different modules")
+
+        key_id = pair.key_id
+        self._pairs.pop(key_id, None)
+        self._pairs[key_id] = pair
+        return key_id
+
+    def get(self, key_id: bytes) -> KeyPair:
+        try:
+            return self._pairs[key_id]
+        except KeyError:
+            raise KeyError(f"No key {key_id.hex()} in keyring") from None
+
+    def find(self, prefix: str) -> KeyPair:
+        """Pair by a hex prefix of its key id"""
+        prefix = prefix.lower()
+        found = [
+            pair
+            for key_id, pair in self._pairs.items()
+            if key_id.hex().startswith(prefix)
+        ]
+        if len(found) != 1:
+            raise KeyError(f"{len(found)} keys match {prefix} in keyring")
+        return found[0]
+
+    @property
+    def default(self) -> KeyPair | None:
+        if not self._pairs:
+            return None
+        return next(reversed(self._pairs.values()))
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def __iter__(self) -> Iterator[KeyPair]:
+        return iter(self._pairs.values())
+
+    def __contains__(self, key_id: bytes) -> bool:
+        return key_id in self._pairs
+
+    def __bytes__(self) -> bytes:
+        body = bytearray(_HEADER.pack(_MAGIC, _VERSION, len(self._pairs)))
+        for public, private in self._pairs.values():
+            profile = public.profile.encode()
+            body += _ENTRY.pack(private.has_crt, len(profile))
+            body += profile
+
+            fields = private if private.has_crt else private[:2]
+            for value in (public.e, *fields):
+                field = _int_to_bytes(value)
+                body += _FIELD_SIZE.pack(len(field))
+                body += field
+
+        body += _CHECKSUM.pack(zlib.crc32(body))
+        return bytes(body)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Keyring":
+        view = memoryview(data)
+        if len(view) < _HEADER.size + _CHECKSUM.size:
+            raise ValueError("Keyring is too short")
+
+        magic, version, count = _HEADER.unpack_from(view)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not an RSA keyring")
+
+        (checksum,) = _CHECKSUM.unpack_from(view, len(view) - _CHECKSUM.size)
+        if zlib.crc32(view[: -_CHECKSUM.size]) != checksum:
+            raise ValueError("Keyring checksum mismatch")
+
+        pairs: list[KeyPair] = []
+        offset = _HEADER.size
+        for _ in range(count):
+            has_crt, profile_size = _ENTRY.unpack_from(view, offset)
+            offset += _ENTRY.size
+            profile = bytes(view[offset : offset + profile_size]).decode()
+            offset += profile_size
+
+            values: list[int] = []
+            for _ in range(1 + (_PRIVATE_FIELDS if has_crt else 2)):
+                (size,) = _FIELD_SIZE.unpack_from(view, offset)
+                offset += _FIELD_SIZE.size
+                values.append(
+                    int.from_bytes(view[offset : offset + size], "big")
+                )
+                offset += size
+
+            e, *fields = values
+            private = PrivateKey(*fields)
+            pairs.append(KeyPair(PublicKey(private.n, e, profile), private))
+
+        if offset != len(view) - _CHECKSUM.size:
+            raise ValueError("Keyring has wrong size")
+
+        return cls(pairs)
+
+
+def _int_to_bytes(value: int) -> bytes:
+    return value.to_bytes((value.bit_length() + 7) // 8, "big")
+
+
+@profiled("keyring_load")
+def load_keyring(path: str = KEYRING_PATH) -> Keyring:
+    """Keyring from path, an empty one if there is no file yet"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return Keyring()
+
+    return _load_keyring(path, stat.st_mtime_ns, stat.st_size)
+
+
+@profiled("keyring_save")
+def save_keyring(keyring: Keyring, path: str = KEYRING_PATH) -> None:
+    with open(path, "wb") as f:
+        f.write(bytes(keyring))
+
+
+@lru_cache(maxsize=KEYRING_CACHE_SIZE)
+def _load_keyring(path: str, mtime_ns: int, size: int) -> Keyring:
+    # mtime и размер входят в ключ кэша, чтобы перезаписанный
+    # файл не отдавался из кэша
+    with open(path, "rb") as f:
+        return Keyring.from_bytes(f.read())
@@ -1,11 +1,17 @@
-from collections.abc import Iterable
-from multiprocessing import Pool
+from collections.abc import Sequence
+from math import ceil
 
-from custom_rsa.calculations import NUM_THREADS, split_to_parallel
+# Имена файлов вынесены в names, здесь -- для старых импортов
+from custom_rsa.names import (
+    DECRYPTED_POSTFIX,
+    ENCRYPTED_POSTFIX,
+    SIGNED_POSTFIX,
+    make_filename,
+)
+from custom_rsa.profiling import count, profiled
+from custom_rsa.serialization import bytes_to_ints, ints_to_bytes
 
-ENCRYPTED_POSTFIX = "encrypted"
-SIGNED_POSTFIX = "signed"
-DECRYPTED_POSTFIX = "decrypted"
+LENGTH_TRAILER_SIZE = 8
 
 
 def read_original(name: str, ext: str) -> bytes:
@@ -24,13 +30,10 @@ def read_encrypted(
     return split_encrypted(buffer, size)
 
 
+@profiled("deserialize")
 def split_encrypted(data: bytes, size: int) -> list[int]:
-    res: list[int] = []
-    for i in range(0, len(data), size):
-        byte = data[i : i + size]
-        res.append(int.from_bytes(byte, "big"))
-
-    return res
+    count("deserialized_bytes", len(data))
+    return bytes_to_ints(data, size)
 
 
 def write_decrypted(
@@ -43,11 +46,10 @@ def write_decrypted(
         f.write(bytes(data))
 
 
-def convert_to_bytes(data: Iterable[int], num_bytes: int) -> bytes:
-    res = b""
-    for item in data:
-        res += int.to_bytes(item, num_bytes, "big")
-    return res
+@profiled("serialize")
+def convert_to_bytes(data: Sequence[int], num_bytes: int) -> bytes:
+    count("serialized_bytes", len(data) * num_bytes)
+    return ints_to_bytes(data, num_bytes)
 
 
 def write_encrypted(
@@ -57,18 +59,7 @@ def write_encrypted(
     num_bytes: int,
     postfix: str = ENCRYPTED_POSTFIX,
 ) -> None:
-    data_len = len(data)
-    processes = max(1, min(NUM_THREADS, data_len))
-    with Pool(processes=processes) as pool:
-        results = pool.starmap(
-            convert_to_bytes,
-            [
-                (chunk, num_bytes)
-                for chunk in split_to_parallel(data, data_len // processes)
-            ],
-        )
-
-    res = b"".join(results)
+    res = convert_to_bytes(data, num_bytes)
 
     with open(f"{name}_{postfix}.{ext}", "wb") as f:
         f.write(res)
@@ -80,3 +71,31 @@ def write_signed(name: str, ext: str, data: list[int], num_bytes: int) -> None:
 
 def read_signed(name: str, ext: str, size: int) -> list[int]:
     return read_encrypted(name, ext, size, postfix=SIGNED_POSTFIX)
+
+
+def plain_block_size(n: int) -> int:
+    """Number of plaintext bytes that always fit into one block under n"""
+    size = (n.bit_length() - 1) // 8
+    if size < 1:
+        raise ValueError("Key is too small for block mode")
+    return size
+
+
+def pack_blocks(data: bytes, size: int) -> list[int]:
+    """
+    Packs data into size-byte big-endian blocks, the last one zero-padded,
+    followed by blocks with the data length (LENGTH_TRAILER_SIZE bytes).
+    Block i always holds plaintext bytes [i * size, (i + 1) * size).
+    """
+    trailer = len(data).to_bytes(LENGTH_TRAILER_SIZE, "big")
+    payload = (
+        data + bytes(-len(data) % size) + bytes(-len(trailer) % size) + trailer
+    )
+    return split_encrypted(payload, size)
+
+
+def unpack_blocks(blocks: list[int], size: int) -> bytes:
+    payload = convert_to_bytes(blocks, size)
+    trailer_size = ceil(LENGTH_TRAILER_SIZE / size) * size
+    length = int.from_bytes(payload[-trailer_size:], "big")
+    return payload[:length]
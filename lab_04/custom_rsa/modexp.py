@@ -0,0 +1,244 @@
+import os
+import time
+from collections.abc import Callable
+from functools import lru_cache
+from random import randrange
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+PowFunc = Callable[[int, int, int], int]
+
+ENGINE_ENV = "CUSTOM_RSA_MODEXP"
+AUTO_ENGINE = "auto"
+
+# Оснований в замере движков
+BENCHMARK_SAMPLES = 4
+SELECT_CACHE_SIZE = 16
+PLAN_CACHE_SIZE = 64
+
+# (ширина окна, максимальная длина показателя в битах)
+_WINDOW_WIDTHS = ((1, 8), (2, 24), (3, 80), (4, 240), (5, 672))
+_MAX_WINDOW_WIDTH = 6
+
+
+def power_log_n(x: int, y: int, p: int) -> int:
+    res = 1  # Initialize result
+
+    # Update x if it is more
+    # than or equal to p
+    x = x % p
+
+    if x == 0:
+        return 0
+
+    while y > 0:
+
+        # If y is odd, multiply
+        # x with result
+        if (y & 1) == 1:
+            res = (res * x) % p
+
+        # y must be even now
+        y = y >> 1  # y = y/2
+        x = (x * x) % p
+
+    return res
+
+
+def window_width(bits: int) -> int:
+    for width, limit in _WINDOW_WIDTHS:
+        if bits <= limit:
+            return width
+    return _MAX_WINDOW_WIDTH
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def fixed_window_plan(y: int, width: int) -> tuple[int, ...]:
+    """Digits of y in base 2^width, most significant first"""
+    mask = (1 << width) - 1
+    digits = []
+    while y:
+        digits.append(y & mask)
+        y >>= width
+    return tuple(reversed(digits))
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def sliding_window_plan(y: int, width: int) -> tuple[tuple[int, int], ...]:
+    """
+    Windows of y, most significant first: (squarings, odd value).
+    res = res^(2^squarings) * x^value; value 0 -- squarings only.
+    Every window is an odd number of at most width bits.
+    """
+    plan = []
+    i = y.bit_length() - 1
+    squarings = 0
+    while i >= 0:
+        if not (y >> i) & 1:
+            squarings += 1
+            i -= 1
+            continue
+
+        # Самое длинное окно не шире width, которое заканчивается единицей
+        low = max(i - width + 1, 0)
+        while not (y >> low) & 1:
+            low += 1
+
+        length = i - low + 1
+        value = (y >> low) & ((1 << length) - 1)
+        plan.append((squarings + length, value))
+        squarings = 0
+        i = low - 1
+
+    if squarings:
+        plan.append((squarings, 0))
+    return tuple(plan)
+
+
+def fixed_window_pow(x: int, y: int, p: int) -> int:
+    """
+    Fixed-window (2^k-ary) exponentiation. The digits of y are cached,
+    so the same exponent applied to many bases is split once.
+    """
+    if p == 1:
+        return 0
+
+    width = window_width(y.bit_length())
+    x %= p
+
+    table = [1, x]
+    for _ in range((1 << width) - 2):
+        table.append(table[-1] * x % p)
+
+    res = 1
+    for digit in fixed_window_plan(y, width):
+        for _ in range(width):
+            res = res * res % p
+        if digit:
+            res = res * table[digit] % p
+
+    return res % p
+
+
+def sliding_window_pow(x: int, y: int, p: int) -> int:
+    """
+    Sliding-window exponentiation over odd powers of x. The window plan
+    of y is cached, so the same exponent applied to many bases is scanned once.
+    """
+    if p == 1:
+        return 0
+
+    width = window_width(y.bit_length())
+    x %= p
+
+    # x^1, x^3, ..., x^(2^width - 1)
+    x2 = x * x % p
+    odd = [x]
+    for _ in range((1 << (width - 1)) - 1):
+        odd.append(odd[-1] * x2 % p)
+
+    res = 1
+    for squarings, value in sliding_window_plan(y, width):
+        for _ in range(squarings):
+            res = res * res % p
+        if value:
+            res = res * odd[value >> 1] % p
+
+    return res % p
+
+
+def gmpy2_pow(x: int, y: int, p: int) -> int:
+    return int(gmpy2.powmod(x, y, p))
+
+
+ENGINES: dict[str, PowFunc] = {
+    "builtin": pow,
+    "binary": power_log_n,
+    "fixed_window": fixed_window_pow,
+    "sliding_window": sliding_window_pow,
+}
+if gmpy2 is not None:
+    ENGINES["gmpy2"] = gmpy2_pow
+
+_engine: str | None = None
+
+
+def register_engine(name: str, func: PowFunc) -> None:
+    """func must be picklable (a module-level function) to run in the pool"""
+    if name == AUTO_ENGINE:
+        raise ValueError(f"{AUTO_ENGINE} is reserved")
+
+    ENGINES[name] = func
+    select_engine.cache_clear()
+
+
+def configure_engine(name: str | None) -> None:
+    """
+    Forces an engine by name, None means ENGINE_ENV or
+    a micro-benchmark for every (exponent, modulus) pair.
+    """
+    global _engine
+
+    if name is not None and name != AUTO_ENGINE and name not in ENGINES:
+        raise ValueError(f"Unknown modexp engine {name}")
+
+    _engine = name
+    select_engine.cache_clear()
+
+
+def engine_name() -> str:
+    if _engine is not None:
+        return _engine
+    return os.environ.get(ENGINE_ENV) or AUTO_ENGINE
+
+
+@lru_cache(maxsize=SELECT_CACHE_SIZE)
+def select_engine(y: int, p: int) -> PowFunc:
+    """Engine for x^y mod p: the configured one or the fastest on samples"""
+    name = engine_name()
+    if name != AUTO_ENGINE:
+        try:
+            return ENGINES[name]
+        except KeyError:
+            raise ValueError(f"Unknown modexp engine {name}") from None
+
+    return benchmark_engines(y, p)[0][1]
+
+
+def auto_pow(x: int, y: int, p: int) -> int:
+    return select_engine(y, p)(x, y, p)
+
+
+def benchmark_engines(y: int, p: int) -> list[tuple[float, PowFunc]]:
+    """
+    Times every engine on the same random bases, fastest first.
+    An engine stops being measured once it is slower than the best one,
+    engines that disagree with pow are skipped.
+    """
+    samples = [randrange(p) for _ in range(BENCHMARK_SAMPLES)]
+    expected = [pow(x, y, p) for x in samples]
+
+    best = float("inf")
+    results = []
+    for func in ENGINES.values():
+        spent = 0.0
+        for x, res in zip(samples, expected):
+            t1 = time.perf_counter()
+            value = func(x, y, p)
+            spent += time.perf_counter() - t1
+
+            if value != res:
+                spent = float("inf")
+                break
+            if spent > best:
+                break
+
+        if spent != float("inf"):
+            best = min(best, spent)
+            results.append((spent, func))
+
+    results.sort(key=lambda result: result[0])
+    return results
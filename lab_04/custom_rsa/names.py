@@ -0,0 +1,16 @@
+# Имена, нужные командной строке еще до разбора режима.
+# Только stdlib: тонкий клиент (--service) не должен грузить numpy и пул.
+
+ENCRYPTED_POSTFIX = "encrypted"
+SIGNED_POSTFIX = "signed"
+DECRYPTED_POSTFIX = "decrypted"
+
+FAST_PUBLIC_PROFILE = "fast-public"
+LEGACY_RANDOM_PROFILE = "legacy-random"
+PROFILES = (FAST_PUBLIC_PROFILE, LEGACY_RANDOM_PROFILE)
+
+
+def make_filename(name: str, ext: str, postfix: str | None = None) -> str:
+    if postfix is None:
+        return f"{name}.{ext}"
+    return f"{name}_{postfix}.{ext}"
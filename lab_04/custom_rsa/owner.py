@@ -1,15 +1,59 @@
 import click
 
-from .keygen import KeyGenRSA, PrivateKey, PublicKey
+from .keygen import FAST_PUBLIC_PROFILE, KeyGenRSA, PrivateKey, PublicKey
+from .header import read_header
+from .keyring import (
+    KEYRING_PATH,
+    KeyPair,
+    Keyring,
+    load_keyring,
+    save_keyring,
+)
+from .cache import get_pow_cache
 from .calculations import hasher, pow_in_executor
+from .hybrid import decrypt_file as decrypt_hybrid_file
+from .hybrid import is_hybrid, read_hybrid_header
+from .misc import plain_block_size, split_encrypted, unpack_blocks
+from .pipeline import cipher_width, decrypt_file, decrypt_range, hash_file
+from .signing import sign_digest, sign_files
 
 
 class Owner:
-    def __init__(self) -> None:
-        keygen = KeyGenRSA()
-        keygen.generate()
-        self._private_key = keygen.private
-        self._public_key = keygen.public
+    def __init__(
+        self,
+        profile: str = FAST_PUBLIC_PROFILE,
+        *,
+        key_id: str | None = None,
+        new_key: bool = False,
+        nbits: int = 16,
+        keyring_path: str = KEYRING_PATH,
+    ) -> None:
+        """
+        key_id -- hex prefix of the key to use, by default the newest one.
+        The legacy single key pair is imported when the keyring is empty.
+        """
+        # Копия: load_keyring отдает общий объект из кэша
+        self._keyring = Keyring(load_keyring(keyring_path))
+
+        if new_key or not len(self._keyring):
+            keygen = KeyGenRSA(nbits, profile=profile)
+            if new_key:
+                keygen.generate_new()
+            else:
+                keygen.generate()
+
+            key_id = self._keyring.add(
+                KeyPair(keygen.public, keygen.private)
+            ).hex()
+            save_keyring(self._keyring, keyring_path)
+            click.secho(f"Key {key_id} added to keyring.", fg="green")
+
+        if key_id is None:
+            pair = self._keyring.default
+        else:
+            pair = self._keyring.find(key_id)
+
+        self._public_key, self._private_key = pair
 
     @property
     def public_key(self) -> PublicKey:
@@ -19,21 +63,102 @@ class Owner:
     def private_key(self) -> PrivateKey:
         return self._private_key
 
+    @property
+    def keyring(self) -> Keyring:
+        return self._keyring
+
+    @property
+    def key_id(self) -> bytes:
+        return KeyPair(self._public_key, self._private_key).key_id
+
     def decrypt(self, data: list[int]) -> list[int]:
         click.secho("Decrypting...", fg="green")
 
-        n, d = self._private_key
-        res = pow_in_executor(data, d, n)
+        key = self._private_key
+        res = get_pow_cache(key.d, key.n, key.pow_func)(data)
 
         click.secho("Decrypted.", fg="green")
         return res
 
+    def decrypt_blocks(
+        self, data: list[int], key: PrivateKey | None = None
+    ) -> bytes:
+        click.secho("Decrypting...", fg="green")
+
+        key = key or self._private_key
+        blocks = pow_in_executor(data, key.d, key.n, pow_func=key.pow_func)
+        res = unpack_blocks(blocks, plain_block_size(key.n))
+
+        click.secho("Decrypted.", fg="green")
+        return res
+
+    def decrypt_file(self, src: str, dst: str, *, block: bool = False) -> None:
+        """
+        Key and mode are taken from the ciphertext header,
+        block is used only for files without a header.
+        """
+        if is_hybrid(src):
+            return self.decrypt_hybrid_file(src, dst)
+
+        click.secho("Decrypting...", fg="green")
+
+        header = read_header(src)
+        if header is None:
+            decrypt_file(self._private_key, src, dst, block=block)
+        else:
+            key = self._keyring.get(header.key_id).private
+            decrypt_file(
+                key,
+                src,
+                dst,
+                block=header.block,
+                offset=header.size,
+                length=header.length,
+            )
+
+        click.secho("Decrypted.", fg="green")
+
+    def decrypt_range(self, src: str, start: int, stop: int) -> bytes:
+        """
+        Plaintext bytes [start, stop) of a ciphertext file with a header,
+        only the blocks covering them are decrypted
+        """
+        if is_hybrid(src):
+            raise ValueError("Range decryption does not support --hybrid")
+
+        header = read_header(src)
+        if header is None:
+            raise ValueError("Range decryption needs a ciphertext header")
+
+        key = self._keyring.get(header.key_id).private
+        return decrypt_range(key, src, header, start, stop)
+
+    def decrypt_hybrid_file(self, src: str, dst: str) -> None:
+        header = read_hybrid_header(src)
+        key = self._keyring.get(header.key_id).private
+        session_key = self.decrypt_blocks(
+            split_encrypted(header.wrapped_key, cipher_width(key.n)), key
+        )
+
+        click.secho("Decrypting payload...", fg="green")
+        decrypt_hybrid_file(session_key, header, src, dst)
+        click.secho("Decrypted payload.", fg="green")
+
     def sign(self, data: bytes) -> list[int]:
-        click.secho("Signing...", fg="green")
-        hashed = hasher(data)
+        return self.sign_digest(hasher(data))
 
-        n, s = self._private_key
-        res = pow_in_executor(hashed, s, n)
+    def sign_file(self, path: str) -> list[int]:
+        return self.sign_digest(hash_file(path))
 
+    def sign_digest(self, hashed: bytes) -> list[int]:
+        """The digest is signed as one block under n if it fits"""
+        click.secho("Signing...", fg="green")
+        res = sign_digest(self._private_key, hashed)
+        click.secho("Signed.", fg="green")
+        return res
+
+    def sign_files(self, paths: list[str]) -> list[list[int]]:
+        click.secho("Signing...", fg="green")
+        res = sign_files(self._private_key, paths)
         click.secho("Signed.", fg="green")
         return res
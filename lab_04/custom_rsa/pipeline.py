@@ -0,0 +1,249 @@
+import hashlib
+import mmap
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from math import ceil
+
+from .cache import get_pow_cache, pow_bytes_serialized
+from .calculations import pow_list
+from .header import CipherHeader
+from .keygen import PrivateKey, PublicKey
+from .keyring import fingerprint
+from .modexp import PowFunc, select_engine
+from .misc import (
+    LENGTH_TRAILER_SIZE,
+    convert_to_bytes,
+    plain_block_size,
+    split_encrypted,
+)
+from .pool import can_parallelize, get_pool, pool_size
+from .profiling import (
+    count,
+    merge_worker_stats,
+    profiled,
+    span,
+    worker_func,
+)
+
+# RSA-блоков в одном куске конвейера
+CHUNK_BLOCKS = 1 << 16
+# Кусков в работе на один процесс пула
+IN_FLIGHT_PER_PROCESS = 2
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def read_chunks(path: str, size: int, offset: int = 0) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            with span("read"):
+                chunk = f.read(size)
+            if not chunk:
+                break
+
+            count("bytes_read", len(chunk))
+            yield chunk
+
+
+def run_ordered(
+    func: Callable[..., bytes],
+    jobs: Iterable[tuple],
+    write: Callable[[bytes], object],
+) -> None:
+    """
+    Runs func(*job) for every job in the shared pool and writes the results
+    in the original order. At most IN_FLIGHT_PER_PROCESS jobs per process
+    are in flight, so memory does not depend on the amount of data.
+    """
+    write = _counted_write(write)
+
+    if not can_parallelize():
+        for job in jobs:
+            with span("compute"):
+                res = func(*job)
+            write(res)
+        return
+
+    pool = get_pool()
+    func = worker_func(func)
+    limit = pool_size() * IN_FLIGHT_PER_PROCESS
+    in_flight = deque()
+
+    for job in jobs:
+        in_flight.append(pool.apply_async(func, job))
+        if len(in_flight) >= limit:
+            write(_wait(in_flight.popleft()))
+
+    while in_flight:
+        write(_wait(in_flight.popleft()))
+
+
+def _wait(result) -> bytes:
+    with span("wait_pool"):
+        res = result.get()
+    return merge_worker_stats(res)
+
+
+def _counted_write(write: Callable[[bytes], object]) -> Callable[[bytes], None]:
+    def counted(data: bytes) -> None:
+        with span("write"):
+            write(data)
+        count("bytes_written", len(data))
+
+    return counted
+
+
+def _encrypt_bytes_chunk(chunk: bytes, e: int, n: int, width: int) -> bytes:
+    return pow_bytes_serialized(chunk, e, n, width)
+
+
+def _encrypt_blocks_chunk(
+    chunk: bytes, e: int, n: int, width: int, size: int, engine: PowFunc
+) -> bytes:
+    return convert_to_bytes(
+        pow_list(split_encrypted(chunk, size), e, n, engine), width
+    )
+
+
+def _decrypt_chunk(
+    chunk: bytes, key: PrivateKey, width: int, size: int | None
+) -> bytes:
+    encrypted = split_encrypted(chunk, width)
+    if size is None:
+        return bytes(get_pow_cache(key.d, key.n, key.pow_func)(encrypted))
+    return convert_to_bytes(
+        pow_list(encrypted, key.d, key.n, key.pow_func), size
+    )
+
+
+def cipher_width(n: int) -> int:
+    return ceil(n.bit_length() / 8)
+
+
+@profiled("encrypt_file")
+def encrypt_file(
+    key: PublicKey, src: str, dst: str, *, block: bool = False
+) -> None:
+    n, e = key.n, key.e
+    width = cipher_width(n)
+
+    size = plain_block_size(n) if block else 1
+    chunks = _CountedChunks(read_chunks(src, size * CHUNK_BLOCKS))
+
+    if block:
+        # Движок выбирается здесь, а не в каждом процессе пула
+        engine = select_engine(e, n)
+        jobs = (
+            (chunk + bytes(-len(chunk) % size), e, n, width, size, engine)
+            for chunk in chunks
+        )
+        func = _encrypt_blocks_chunk
+    else:
+        jobs = ((chunk, e, n, width) for chunk in chunks)
+        func = _encrypt_bytes_chunk
+
+    header = CipherHeader.for_data(fingerprint(key), block, width, size)
+    with open(dst, "wb") as f:
+        f.write(bytes(header))
+        run_ordered(func, jobs, f.write)
+
+        # Длина известна только после чтения всего src
+        header = header.with_length(chunks.length)
+        f.seek(0)
+        f.write(bytes(header))
+
+    count("rsa_blocks", header.blocks)
+
+
+class _CountedChunks:
+    """Iterator over chunks that counts their total length"""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self.length = 0
+
+    def __iter__(self) -> "_CountedChunks":
+        return self
+
+    def __next__(self) -> bytes:
+        chunk = next(self._chunks)
+        self.length += len(chunk)
+        return chunk
+
+
+@profiled("decrypt_file")
+def decrypt_file(
+    key: PrivateKey,
+    src: str,
+    dst: str,
+    *,
+    block: bool = False,
+    offset: int = 0,
+    length: int | None = None,
+) -> None:
+    """
+    offset -- size of the ciphertext header to skip,
+    length -- plaintext length from the header. Without it the length
+    in block mode is read from the trailing blocks.
+    """
+    width = cipher_width(key.n)
+    size = plain_block_size(key.n) if block else None
+    jobs = (
+        (chunk, key, width, size)
+        for chunk in read_chunks(src, width * CHUNK_BLOCKS, offset)
+    )
+
+    with open(dst, "w+b") as f:
+        run_ordered(_decrypt_chunk, jobs, f.write)
+        count("rsa_blocks", f.tell() // (size or 1))
+
+        if length is None and block:
+            # Последние блоки -- длина исходных данных, дальше -- дополнение
+            trailer_size = ceil(LENGTH_TRAILER_SIZE / size) * size
+            f.seek(-trailer_size, 2)
+            length = int.from_bytes(f.read(trailer_size), "big")
+
+        if length is not None:
+            f.truncate(length)
+
+
+@profiled("decrypt_range")
+def decrypt_range(
+    key: PrivateKey, src: str, header: CipherHeader, start: int, stop: int
+) -> bytes:
+    """
+    Plaintext bytes [start, stop) of a seekable ciphertext file.
+    Only the blocks covering the range are read (through mmap) and decrypted.
+    """
+    if not header.seekable:
+        raise ValueError("Range decryption needs a version 2 ciphertext")
+    if start < 0 or stop < start:
+        raise ValueError(f"Bad range {start}:{stop}")
+
+    stop = min(stop, header.length)
+    if start >= stop:
+        return b""
+
+    width, size = header.width, header.plain_size
+    first, last = start // size, ceil(stop / size)
+
+    with open(src, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            chunk = mapped[
+                header.size + first * width : header.size + last * width
+            ]
+
+    if len(chunk) != (last - first) * width:
+        raise ValueError("Ciphertext is truncated")
+
+    count("rsa_blocks", last - first)
+    plain = _decrypt_chunk(chunk, key, width, size if header.block else None)
+    return plain[start - first * size : stop - first * size]
+
+
+@profiled("hash_file")
+def hash_file(path: str) -> bytes:
+    hashed = hashlib.sha3_256()
+    for chunk in read_chunks(path, HASH_CHUNK_SIZE):
+        hashed.update(chunk)
+    return hashed.digest()
@@ -0,0 +1,85 @@
+import atexit
+import os
+from math import ceil
+from multiprocessing import Pool
+from multiprocessing.pool import Pool as PoolType
+
+from .profiling import span
+
+PROCESSES_ENV = "CUSTOM_RSA_PROCESSES"
+
+# Меньше этого количества элементов считается в текущем процессе:
+# пересылка в пул обойдется дороже самих вычислений
+MIN_PARALLEL_ITEMS = 512
+# Кусков на процесс -- чтобы выровнять нагрузку, не дробя данные слишком мелко
+CHUNKS_PER_PROCESS = 4
+MIN_CHUNK_SIZE = 128
+
+_pool: PoolType | None = None
+_processes: int | None = None
+_atexit_registered = False
+# Внутри процесса пула свой пул не создается
+_is_worker = False
+
+
+def _init_worker() -> None:
+    global _is_worker
+    _is_worker = True
+
+
+def configure_pool(processes: int | None) -> None:
+    """Sets the pool size, None means PROCESSES_ENV or os.cpu_count()"""
+    global _processes
+
+    if processes is not None and processes < 1:
+        raise ValueError("Pool needs at least one process")
+
+    if processes != _processes:
+        shutdown_pool()
+        _processes = processes
+
+
+def pool_size() -> int:
+    if _processes is not None:
+        return _processes
+
+    from_env = os.environ.get(PROCESSES_ENV)
+    if from_env:
+        return max(1, int(from_env))
+
+    return os.cpu_count() or 1
+
+
+def get_pool() -> PoolType:
+    global _pool, _atexit_registered
+
+    if _pool is None:
+        with span("pool_start"):
+            _pool = Pool(processes=pool_size(), initializer=_init_worker)
+
+        if not _atexit_registered:
+            atexit.register(shutdown_pool)
+            _atexit_registered = True
+
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+        _pool = None
+
+
+def can_parallelize() -> bool:
+    return not _is_worker and pool_size() > 1
+
+
+def should_parallelize(items: int) -> bool:
+    return items >= MIN_PARALLEL_ITEMS and can_parallelize()
+
+
+def chunk_size(items: int) -> int:
+    return max(MIN_CHUNK_SIZE, ceil(items / (pool_size() * CHUNKS_PER_PROCESS)))
@@ -0,0 +1,123 @@
+import os
+from random import SystemRandom
+
+from .pool import can_parallelize, get_pool, pool_size
+
+# Простые до этого предела вычеркиваются из окна кандидатов решетом
+SIEVE_PRIMES_LIMIT = 1 << 16
+# Нечетных кандидатов в одном окне решета
+SIEVE_WINDOW = 1 << 12
+MILLER_RABIN_ROUNDS = 20
+
+_random = SystemRandom()
+
+
+def collect_primes(limit: int) -> list[int]:
+    """Sieve of Eratosthenes: all primes below limit"""
+    is_prime = bytearray([1]) * limit
+    is_prime[:2] = b"\x00\x00"
+
+    for i in range(2, int(limit**0.5) + 1):
+        if is_prime[i]:
+            is_prime[i * i :: i] = bytes(len(range(i * i, limit, i)))
+
+    return [i for i, flag in enumerate(is_prime) if flag]
+
+
+SMALL_PRIMES = collect_primes(SIEVE_PRIMES_LIMIT)
+_ODD_SMALL_PRIMES = SMALL_PRIMES[1:]
+_SMALL_PRIMES_SET = frozenset(SMALL_PRIMES)
+
+
+def is_probable_prime(n: int, rounds: int = MILLER_RABIN_ROUNDS) -> bool:
+    """Miller-Rabin with one modexp per round followed by repeated squaring"""
+    if n < SIEVE_PRIMES_LIMIT:
+        return n in _SMALL_PRIMES_SET
+
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d >>= 1
+        s += 1
+
+    for _ in range(rounds):
+        x = pow(_random.randrange(2, n - 1), d, n)
+        if x == 1 or x == n - 1:
+            continue
+
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def sieve_window(start: int, count: int) -> bytearray:
+    """
+    Marks composites among the odd candidates start + 2 * i, i < count.
+    start must be odd. Small primes themselves are not marked.
+    """
+    composite = bytearray(count)
+
+    for p in _ODD_SMALL_PRIMES:
+        # start + 2i = 0 (mod p) => i = -start * 2^-1 (mod p), 2^-1 = (p + 1) / 2
+        i = (-start * ((p + 1) >> 1)) % p
+        if start + 2 * i == p:
+            i += p
+        if i < count:
+            composite[i::p] = b"\x01" * len(range(i, count, p))
+
+    return composite
+
+
+def random_prime(bits: int) -> int:
+    """
+    Random prime from [2^(bits-1) + 2^(bits-2), 2^bits - 1]: the top two bits
+    are set, so a product of such primes has exactly the sum of their bits
+    """
+    while True:
+        prime = search_window(bits)
+        if prime is not None:
+            return prime
+
+
+def search_window(bits: int) -> int | None:
+    """First prime of one sieve window at a random start, None if none"""
+    low, high = 3 << (bits - 2), 2**bits - 1
+    if low > high:
+        raise ValueError(f"No primes with {bits} bits in range")
+
+    start = _random.randrange(low, high + 1) | 1
+    if start > high:
+        return None
+
+    count = min(SIEVE_WINDOW, (high - start) // 2 + 1)
+    composite = sieve_window(start, count)
+
+    i = composite.find(0)
+    while i != -1:
+        candidate = start + 2 * i
+        if is_probable_prime(candidate):
+            return candidate
+        i = composite.find(0, i + 1)
+    return None
+
+
+def random_prime_parallel(bits: int, searches: int) -> int:
+    """
+    Searches windows in the shared pool, searches at a time, and returns
+    the first prime found. The rest of that round is not waited for and
+    no new windows are submitted.
+    """
+    # Поисков больше, чем ядер, только замедляют первый результат
+    searches = min(searches, pool_size(), os.cpu_count() or 1)
+    if searches <= 1 or not can_parallelize():
+        return random_prime(bits)
+
+    pool = get_pool()
+    while True:
+        for prime in pool.imap_unordered(search_window, [bits] * searches):
+            if prime is not None:
+                return prime
@@ -0,0 +1,163 @@
+import functools
+import resource
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable
+from contextlib import nullcontext
+from typing import TypeVar
+
+SPAN_SEPARATOR = "/"
+
+_F = TypeVar("_F", bound=Callable)
+
+_enabled = False
+_stack: list[str] = []
+# путь вложенных спанов -> [вызовов, секунд]
+_spans: dict[str, list] = {}
+_counters: Counter[str] = Counter()
+_NO_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("_name", "_start")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> "_Span":
+        _stack.append(self._name)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self._start
+        path = SPAN_SEPARATOR.join(_stack)
+        _stack.pop()
+
+        stats = _spans.setdefault(path, [0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+def enable_profiling(enabled: bool = True) -> None:
+    """Spans and counters are recorded only after this call"""
+    global _enabled
+    _enabled = enabled
+
+
+def reset_profiling() -> None:
+    _stack.clear()
+    _spans.clear()
+    _counters.clear()
+
+
+def span(name: str) -> _Span | nullcontext:
+    """
+    Timing span nested into the currently open ones.
+    Pool workers are measured only through worker_func.
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name)
+
+
+def profiled(name: str) -> Callable[[_F], _F]:
+    """Decorator: the whole call is one span"""
+
+    def decorator(func: _F) -> _F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name: str, value: int = 1) -> None:
+    if _enabled:
+        _counters[name] += value
+
+
+def worker_func(func: _F) -> _F:
+    """
+    func to send to the pool. With profiling on, the worker records its own
+    spans and counters and returns them with the result, which has to be
+    passed through merge_worker_stats in the parent.
+    """
+    if not _enabled:
+        return func
+    return functools.partial(_run_in_worker, func)
+
+
+def _run_in_worker(func: Callable, *args) -> tuple:
+    reset_profiling()
+    enable_profiling()
+    try:
+        with _Span("workers"):
+            result = func(*args)
+    finally:
+        enable_profiling(False)
+    return result, dict(_spans), dict(_counters)
+
+
+def merge_worker_stats(result):
+    """
+    Result of a worker_func call. Worker spans are nested into the current
+    span under "workers", their time is summed over all processes.
+    """
+    if not _enabled:
+        return result
+
+    result, spans, counters = result
+    for path, (calls, seconds) in spans.items():
+        path = SPAN_SEPARATOR.join([*_stack, path])
+        stats = _spans.setdefault(path, [0, 0.0])
+        stats[0] += calls
+        stats[1] += seconds
+    _counters.update(counters)
+    return result
+
+
+def _max_rss_bytes(who: int) -> int:
+    rss = resource.getrusage(who).ru_maxrss
+    # На macOS ru_maxrss в байтах, на Linux -- в килобайтах
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def report() -> dict:
+    return {
+        "spans": [
+            {"name": path, "calls": calls, "seconds": seconds}
+            for path, (calls, seconds) in _spans.items()
+        ],
+        "counters": dict(_counters),
+        "peak_rss_bytes": _max_rss_bytes(resource.RUSAGE_SELF),
+        "peak_rss_children_bytes": _max_rss_bytes(resource.RUSAGE_CHILDREN),
+    }
+
+
+def format_report(data: dict) -> str:
+    lines = []
+    for item in sorted(data["spans"], key=lambda item: item["name"]):
+        depth = item["name"].count(SPAN_SEPARATOR)
+        name = item["name"].rsplit(SPAN_SEPARATOR, 1)[-1]
+        lines.append(
+            f"{'  ' * depth}{name:<{32 - 2 * depth}} "
+            f"{item['calls']:>8} calls {item['seconds'] * 1e3:>12.3f} ms"
+        )
+
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"{name:<32} {value:>20}")
+
+    lines.append(f"{'peak rss':<32} {data['peak_rss_bytes'] / 1e6:>17.2f} MB")
+    lines.append(
+        f"{'peak rss (pool)':<32} "
+        f"{data['peak_rss_children_bytes'] / 1e6:>17.2f} MB"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,87 @@
+import json
+import socket
+import struct
+
+# Протокол сервиса: клиенту нужен только этот модуль (и stdlib),
+# чтобы тонкий клиент не грузил numpy, пул и генератор ключей
+
+SERVICE_SOCKET = "/tmp/custom_rsa.sock"
+OPERATIONS = ("encrypt", "decrypt", "sign", "verify")
+MAX_FRAME_SIZE = 1 << 30
+
+# Кадр: длина JSON-заголовка, длина данных, заголовок, данные
+_FRAME = struct.Struct(">II")
+FRAME_SIZE = _FRAME.size
+
+
+def encode_frame(header: dict, payload: bytes = b"") -> bytes:
+    encoded = json.dumps(header).encode()
+    return _FRAME.pack(len(encoded), len(payload)) + encoded + payload
+
+
+def decode_frame_sizes(data: bytes) -> tuple[int, int]:
+    """Header and payload sizes from the first FRAME_SIZE bytes of a frame"""
+    header_size, payload_size = _FRAME.unpack(data)
+    if header_size + payload_size > MAX_FRAME_SIZE:
+        raise ValueError("Frame is too large")
+    return header_size, payload_size
+
+
+class ServiceClient:
+    """Blocking client of RSAService, one connection per instance"""
+
+    def __init__(self, path: str = SERVICE_SOCKET) -> None:
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(path)
+
+    def request(self, op: str, payload: bytes, **fields: str) -> bytes:
+        self._socket.sendall(encode_frame({"op": op, **fields}, payload))
+
+        header_size, payload_size = decode_frame_sizes(
+            self._read_exact(FRAME_SIZE)
+        )
+        header = json.loads(self._read_exact(header_size))
+        result = self._read_exact(payload_size)
+
+        if not header["ok"]:
+            raise ValueError(header["error"])
+        return result
+
+    def encrypt(self, data: bytes, key_id: str | None = None) -> bytes:
+        return self.request("encrypt", data, **_key_field(key_id))
+
+    def decrypt(self, data: bytes) -> bytes:
+        return self.request("decrypt", data)
+
+    def sign(self, data: bytes, key_id: str | None = None) -> bytes:
+        return self.request("sign", data, **_key_field(key_id))
+
+    def verify(
+        self, data: bytes, signature: bytes, key_id: str | None = None
+    ) -> bool:
+        res = self.request(
+            "verify", data, signature=signature.hex(), **_key_field(key_id)
+        )
+        return res == b"\x01"
+
+    def close(self) -> None:
+        self._socket.close()
+
+    def __enter__(self) -> "ServiceClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _read_exact(self, size: int) -> bytes:
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = self._socket.recv(size - len(buffer))
+            if not chunk:
+                raise ConnectionError("Service closed the connection")
+            buffer += chunk
+        return bytes(buffer)
+
+
+def _key_field(key_id: str | None) -> dict[str, str]:
+    return {} if key_id is None else {"key_id": key_id}
@@ -0,0 +1,67 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+# Шире 8 байт целые уже не помещаются в uint64
+NUMPY_MAX_WIDTH = 8
+_U64 = np.dtype(">u8")
+
+
+def ints_to_bytes(values: Sequence[int], width: int) -> bytes:
+    """Serializes values as fixed-width big-endian integers"""
+    if width <= NUMPY_MAX_WIDTH:
+        return _ints_to_bytes_numpy(values, width)
+    return _ints_to_bytes_wide(values, width)
+
+
+def bytes_to_ints(data: bytes, width: int) -> list[int]:
+    """
+    Splits data into fixed-width big-endian integers.
+    A trailing piece shorter than width becomes the last integer.
+    """
+    full = len(data) - len(data) % width
+    view = memoryview(data)
+
+    if width <= NUMPY_MAX_WIDTH:
+        res = _bytes_to_ints_numpy(view[:full], width)
+    else:
+        res = _bytes_to_ints_wide(view[:full], width)
+
+    if full != len(data):
+        res.append(int.from_bytes(view[full:], "big"))
+    return res
+
+
+def _ints_to_bytes_numpy(values: Sequence[int], width: int) -> bytes:
+    packed = np.asarray(values, dtype=np.uint64)
+    if width < NUMPY_MAX_WIDTH and (packed >> np.uint64(8 * width)).any():
+        raise OverflowError(f"int too big to convert into {width} bytes")
+
+    packed = packed.astype(_U64)
+    return packed.view(np.uint8).reshape(-1, 8)[:, 8 - width :].tobytes()
+
+
+def _bytes_to_ints_numpy(data: memoryview, width: int) -> list[int]:
+    count = len(data) // width
+    padded = np.zeros((count, 8), dtype=np.uint8)
+    padded[:, 8 - width :] = np.frombuffer(data, dtype=np.uint8).reshape(
+        count, width
+    )
+    return padded.view(_U64).ravel().tolist()
+
+
+def _ints_to_bytes_wide(values: Sequence[int], width: int) -> bytes:
+    res = bytearray(len(values) * width)
+    view = memoryview(res)
+
+    for i, value in enumerate(values):
+        view[i * width : (i + 1) * width] = value.to_bytes(width, "big")
+
+    return bytes(res)
+
+
+def _bytes_to_ints_wide(data: memoryview, width: int) -> list[int]:
+    return [
+        int.from_bytes(data[i : i + width], "big")
+        for i in range(0, len(data), width)
+    ]
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import os
+import stat
+from collections.abc import Callable
+from typing import NamedTuple
+
+from .calculations import hasher, pow_list
+from .header import CipherHeader
+from .keyring import KeyPair, Keyring
+from .misc import (
+    convert_to_bytes,
+    plain_block_size,
+    split_encrypted,
+    unpack_blocks,
+)
+from .modexp import select_engine
+from .pipeline import cipher_width
+from .pool import can_parallelize, get_pool
+from .protocol import (
+    FRAME_SIZE,
+    SERVICE_SOCKET,
+    decode_frame_sizes,
+    encode_frame,
+)
+from .signing import sign_digest, verify_digest
+
+# Сколько ждать соседние запросы перед отправкой пакета в пул
+BATCH_WINDOW = 0.001
+MAX_BATCH_ITEMS = 256
+
+
+class Item(NamedTuple):
+    payload: bytes
+    # Подпись для verify
+    signature: bytes = b""
+
+
+def run_batch(op: str, pair: KeyPair, items: list[Item]) -> list[tuple]:
+    """
+    Runs one operation with one key for every item.
+    Results are (True, data) or (False, error message).
+    """
+    func = _OPERATIONS[op]
+    results = []
+    for item in items:
+        try:
+            results.append((True, func(pair, item)))
+        except Exception as e:
+            # Ошибка одного запроса не должна ронять весь пакет
+            results.append((False, _error_message(e)))
+    return results
+
+
+def _encrypt(pair: KeyPair, item: Item) -> bytes:
+    n, e = pair.public.n, pair.public.e
+    width, size = cipher_width(n), plain_block_size(n)
+
+    # Тот же контейнер, что и у encrypt_file в блочном режиме
+    header = CipherHeader.for_data(pair.key_id, True, width, size)
+    header = header.with_length(len(item.payload))
+    blocks = split_encrypted(
+        item.payload + bytes(-len(item.payload) % size), size
+    )
+    encrypted = pow_list(blocks, e, n, select_engine(e, n))
+    return bytes(header) + convert_to_bytes(encrypted, width)
+
+
+def _decrypt(pair: KeyPair, item: Item) -> bytes:
+    key = pair.private
+    header = CipherHeader.from_bytes(item.payload)
+    width = cipher_width(key.n)
+
+    blocks = split_encrypted(item.payload[header.size :], width)
+    decrypted = pow_list(blocks, key.d, key.n, key.pow_func)
+    if not header.block:
+        return bytes(decrypted)
+
+    size = plain_block_size(key.n)
+    if header.seekable:
+        return convert_to_bytes(decrypted, size)[: header.length]
+    return unpack_blocks(decrypted, size)
+
+
+def _sign(pair: KeyPair, item: Item) -> bytes:
+    signed = sign_digest(pair.private, hasher(item.payload))
+    return convert_to_bytes(signed, cipher_width(pair.private.n))
+
+
+def _verify(pair: KeyPair, item: Item) -> bytes:
+    width = cipher_width(pair.public.n)
+    if not item.signature or len(item.signature) % width:
+        return b"\x00"
+
+    signature = split_encrypted(item.signature, width)
+    verified = verify_digest(pair.public, hasher(item.payload), signature)
+    return b"\x01" if verified else b"\x00"
+
+
+_OPERATIONS: dict[str, Callable[[KeyPair, Item], bytes]] = {
+    "encrypt": _encrypt,
+    "decrypt": _decrypt,
+    "sign": _sign,
+    "verify": _verify,
+}
+
+
+class _Pending(NamedTuple):
+    item: Item
+    future: asyncio.Future
+
+
+class RSAService:
+    """
+    Локальный сервис: держит связку ключей и прогретый пул процессов.
+    Одновременные запросы с одной операцией и одним ключом собираются
+    в пакет (не дольше BATCH_WINDOW) и уходят в пул одним заданием.
+    """
+
+    def __init__(self, keyring: Keyring, default_key_id: bytes) -> None:
+        self._keyring = keyring
+        self._default_key_id = default_key_id
+        self._batches: dict[tuple[str, bytes], list[_Pending]] = {}
+
+    async def serve(self, path: str = SERVICE_SOCKET) -> None:
+        """Raises FileExistsError if path exists and is not a socket"""
+        try:
+            mode = os.stat(path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"{path} exists and is not a socket")
+            # Сокет, оставшийся от прошлого запуска
+            os.remove(path)
+
+        if can_parallelize():
+            get_pool()
+
+        server = await asyncio.start_unix_server(self._handle, path=path)
+        async with server:
+            await server.serve_forever()
+
+    async def submit(self, op: str, key: str | None, item: Item) -> bytes:
+        """key -- hex prefix of the key id, by default the service key"""
+        if op not in _OPERATIONS:
+            raise ValueError(f"Unknown operation {op}")
+
+        if op == "decrypt":
+            # Ключ расшифрования указан в заголовке шифротекста
+            key_id = CipherHeader.from_bytes(item.payload).key_id
+            self._keyring.get(key_id)
+        elif key is not None:
+            key_id = self._keyring.find(key).key_id
+        else:
+            key_id = self._default_key_id
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch_key = (op, key_id)
+        batch = self._batches.setdefault(batch_key, [])
+        batch.append(_Pending(item, future))
+        if len(batch) == 1:
+            loop.call_later(BATCH_WINDOW, self._flush, batch_key)
+        elif len(batch) >= MAX_BATCH_ITEMS:
+            self._flush(batch_key)
+
+        ok, result = await future
+        if not ok:
+            raise ValueError(result)
+        return result
+
+    def _flush(self, batch_key: tuple[str, bytes]) -> None:
+        batch = self._batches.pop(batch_key, None)
+        if not batch:
+            return
+
+        op, key_id = batch_key
+        args = (op, self._keyring.get(key_id), [p.item for p in batch])
+        loop = asyncio.get_running_loop()
+
+        def done(results: list[tuple]) -> None:
+            for pending, result in zip(batch, results):
+                if not pending.future.done():
+                    pending.future.set_result(result)
+
+        def failed(error: BaseException) -> None:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(error)
+
+        if can_parallelize():
+            get_pool().apply_async(
+                run_batch,
+                args,
+                callback=lambda res: loop.call_soon_threadsafe(done, res),
+                error_callback=lambda e: loop.call_soon_threadsafe(failed, e),
+            )
+            return
+
+        task = loop.run_in_executor(None, run_batch, *args)
+        task.add_done_callback(
+            lambda t: (
+                failed(t.exception()) if t.exception() else done(t.result())
+            )
+        )
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    sizes = await reader.readexactly(FRAME_SIZE)
+                except asyncio.IncompleteReadError:
+                    break
+
+                header_size, payload_size = decode_frame_sizes(sizes)
+                header = await reader.readexactly(header_size)
+                payload = await reader.readexactly(payload_size)
+
+                writer.write(await self._respond(header, payload))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, raw_header: bytes, payload: bytes) -> bytes:
+        # Любая ошибка запроса возвращается клиенту, соединение не рвется
+        try:
+            header = json.loads(raw_header)
+            item = Item(payload, bytes.fromhex(header.get("signature", "")))
+            result = await self.submit(header["op"], header.get("key_id"), item)
+        except Exception as e:
+            return encode_frame({"ok": False, "error": _error_message(e)})
+
+        return encode_frame({"ok": True}, result)
+
+
+def _error_message(error: BaseException) -> str:
+    if isinstance(error, KeyError) and error.args:
+        # str(KeyError) добавляет кавычки
+        return str(error.args[0])
+    return str(error) or type(error).__name__
@@ -0,0 +1,100 @@
+from collections.abc import Callable
+
+from .calculations import pow_list
+from .keygen import PrivateKey, PublicKey
+from .modexp import select_engine
+from .misc import plain_block_size, split_encrypted
+from .pipeline import hash_file
+from .pool import CHUNKS_PER_PROCESS, can_parallelize, get_pool, pool_size
+from .profiling import count, merge_worker_stats, profiled, worker_func
+
+# Файлов на одно задание пула при пакетной подписи
+MIN_FILES_CHUNK = 1
+
+
+def encode_digest(digest: bytes, n: int) -> list[int]:
+    """
+    Digest as integers under n: one block if all its bits fit under n,
+    otherwise plain_block_size(n)-byte blocks, the last one zero-padded.
+    No bits of the digest are dropped.
+    """
+    if n.bit_length() > 8 * len(digest):
+        return [int.from_bytes(digest, "big")]
+
+    size = plain_block_size(n)
+    return split_encrypted(digest + bytes(-len(digest) % size), size)
+
+
+def sign_digest(key: PrivateKey, digest: bytes) -> list[int]:
+    return pow_list(encode_digest(digest, key.n), key.d, key.n, key.pow_func)
+
+
+def verify_digest(key: PublicKey, digest: bytes, signature: list[int]) -> bool:
+    """
+    Also accepts signatures of the old format,
+    where every digest byte is signed separately.
+    """
+    if not all(0 <= block < key.n for block in signature):
+        return False
+
+    decoded = pow_list(signature, key.e, key.n, select_engine(key.e, key.n))
+    if decoded == encode_digest(digest, key.n):
+        return True
+    return len(signature) == len(digest) and decoded == list(digest)
+
+
+def _sign_files(key: PrivateKey, paths: list[str]) -> list[list[int]]:
+    return [sign_digest(key, hash_file(path)) for path in paths]
+
+
+def _verify_files(
+    key: PublicKey, paths: list[str], signatures: list[list[int]]
+) -> list[bool]:
+    return [
+        verify_digest(key, hash_file(path), signature)
+        for path, signature in zip(paths, signatures)
+    ]
+
+
+@profiled("sign_files")
+def sign_files(key: PrivateKey, paths: list[str]) -> list[list[int]]:
+    """
+    Signatures of the files in the same order. Hashing and
+    exponentiation of several files are spread over the shared pool.
+    """
+    return _run_batch(_sign_files, key, paths)
+
+
+@profiled("verify_files")
+def verify_files(
+    key: PublicKey, paths: list[str], signatures: list[list[int]]
+) -> list[bool]:
+    if len(paths) != len(signatures):
+        raise ValueError("Every file needs a signature")
+
+    return _run_batch(_verify_files, key, paths, signatures)
+
+
+def _run_batch(
+    func: Callable[..., list], key: tuple, paths: list[str], *columns: list
+) -> list:
+    count("rsa_blocks", len(paths))
+    if len(paths) < 2 or not can_parallelize():
+        return func(key, paths, *columns)
+
+    size = max(
+        MIN_FILES_CHUNK, len(paths) // (pool_size() * CHUNKS_PER_PROCESS)
+    )
+    jobs = [
+        (
+            key,
+            paths[i : i + size],
+            *(column[i : i + size] for column in columns),
+        )
+        for i in range(0, len(paths), size)
+    ]
+
+    results = []
+    for chunk in get_pool().starmap(worker_func(func), jobs):
+        results.extend(merge_worker_stats(chunk))
+    return results
@@ -1,22 +1,62 @@
+import cProfile
+import json
 import time
 from math import ceil
+from typing import TYPE_CHECKING
 
 import click
 
-from custom_rsa.client import Client
-from custom_rsa.misc import (
-    read_encrypted,
-    read_original,
-    read_signed,
-    write_decrypted,
-    write_encrypted,
-    write_signed,
+# Тонкому клиенту (--service) нужны только эти модули, остальное
+# (numpy, пул, генератор ключей) импортируется в локальном режиме
+from custom_rsa.names import (
+    DECRYPTED_POSTFIX,
+    ENCRYPTED_POSTFIX,
+    FAST_PUBLIC_PROFILE,
+    PROFILES,
+    SIGNED_POSTFIX,
+    make_filename,
 )
-from custom_rsa.owner import Owner
+from custom_rsa.protocol import ServiceClient
+
+if TYPE_CHECKING:
+    from custom_rsa.owner import Owner
+
+
+def _parse_range(
+    ctx: click.Context, param: click.Parameter, value: str | None
+) -> tuple[int, int] | None:
+    """START:STOP of --range, 0 <= START <= STOP"""
+    if value is None:
+        return None
+
+    try:
+        start, stop = map(int, value.split(":"))
+    except ValueError:
+        raise click.BadParameter("expected START:STOP") from None
+    if start < 0 or stop < start:
+        raise click.BadParameter("expected 0 <= START <= STOP")
+    return start, stop
+
+
+def _check_engine(
+    ctx: click.Context, param: click.Parameter, value: str | None
+) -> str | None:
+    """modexp is imported only when --modexp is given"""
+    if value is None:
+        return None
+
+    from custom_rsa.modexp import AUTO_ENGINE, ENGINES
+
+    names = [AUTO_ENGINE, *ENGINES]
+    if value not in names:
+        raise click.BadParameter(f"expected one of {', '.join(names)}")
+    return value
 
 
 @click.command()
-@click.argument("filename", type=click.Path(exists=True))
+@click.argument(
+    "filenames", nargs=-1, required=True, type=click.Path(exists=True)
+)
 @click.option(
     "--encrypt",
     is_flag=True,
@@ -45,43 +85,299 @@ from custom_rsa.owner import Owner
     default=False,
     help="Sign data",
 )
+@click.option(
+    "--block",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help="Pack as many bytes as fit under n into each RSA block.",
+)
+@click.option(
+    "--processes",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Worker processes (default: $CUSTOM_RSA_PROCESSES or CPU count).",
+)
+@click.option(
+    "--key_profile",
+    type=click.Choice(PROFILES),
+    default=FAST_PUBLIC_PROFILE,
+    show_default=True,
+    help="Key generation profile (used only when new keys are generated).",
+)
+@click.option(
+    "--key_id",
+    default=None,
+    help="Hex prefix of the keyring key to use (default: the newest key).",
+)
+@click.option(
+    "--new_key",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help="Generate a new key pair into the keyring and use it.",
+)
+@click.option(
+    "--bits",
+    type=click.IntRange(min=16),
+    default=16,
+    show_default=True,
+    help="Modulus size for newly generated keys.",
+)
+@click.option(
+    "--modexp",
+    default=None,
+    callback=_check_engine,
+    help="Modular exponentiation engine: auto, builtin, binary, "
+    "fixed_window, sliding_window or gmpy2 if installed "
+    "(default: $CUSTOM_RSA_MODEXP or a micro-benchmark).",
+)
+@click.option(
+    "--hybrid",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help="Wrap a random session key with RSA and encrypt data with AES-GCM.",
+)
+@click.option(
+    "--range",
+    "byte_range",
+    default=None,
+    callback=_parse_range,
+    help="Decrypt only plaintext bytes START:STOP.",
+)
+@click.option(
+    "--profile",
+    "profile_format",
+    type=click.Choice(["text", "json"]),
+    default=None,
+    help="Report timing spans, counters and peak memory.",
+)
+@click.option(
+    "--profile_output",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="File for the profile report (default: stdout).",
+)
+@click.option(
+    "--cprofile",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Dump cProfile statistics of the run to this file. "
+    "The run is done in this process, without the pool, "
+    "so the dump covers modexp and serialization.",
+)
+@click.option(
+    "--service",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Send requests to a running serve.py on this socket.",
+)
 def run(
-    filename: str,
+    filenames: tuple[str, ...],
     encrypt: bool = False,
     decrypt: bool = False,
     sign: bool = False,
     verify: bool = False,
+    block: bool = False,
+    processes: int | None = None,
+    key_profile: str = FAST_PUBLIC_PROFILE,
+    key_id: str | None = None,
+    new_key: bool = False,
+    bits: int = 16,
+    modexp: str | None = None,
+    hybrid: bool = False,
+    byte_range: tuple[int, int] | None = None,
+    profile_format: str | None = None,
+    profile_output: str | None = None,
+    cprofile: str | None = None,
+    service: str | None = None,
 ) -> None:
     t1 = time.time_ns()
 
-    owner = Owner()
-    client = Client(owner.public_key)
-    nbits = ceil(owner.public_key.n.bit_length() / 8)
-
-    name, ext = filename.split(".")
-
-    if sign:
-        buffer: bytes = read_original(name, ext)
-        signed = owner.sign(buffer)
-        write_signed(name, ext, signed, num_bytes=nbits)
-    elif verify:
-        buffer: bytes = read_original(name, ext)
-        signed: list[int] = read_signed(name, ext, size=nbits)
-        client.verify(buffer, signed)
-    elif encrypt:
-        buffer: bytes = read_original(name, ext)
-        encrypted = client.encrypt(buffer)
-        write_encrypted(name, ext, encrypted, num_bytes=nbits)
-    elif decrypt:
-        buffer: list[int] = read_encrypted(name, ext, size=nbits)
-        write_decrypted(name, ext, owner.decrypt(buffer))
+    if service is not None:
+        if hybrid or byte_range is not None:
+            click.secho("--hybrid and --range work only locally", fg="red")
+            return
 
-    else:
+        names = [filename.split(".") for filename in filenames]
+        modes = {"sign": sign, "verify": verify, "encrypt": encrypt}
+        mode = next((mode for mode, on in modes.items() if on), None)
+        if mode is None and decrypt:
+            mode = "decrypt"
+        try:
+            _run_remote(service, names, mode, key_id)
+        except (OSError, ValueError) as e:
+            click.secho(f"Service error: {e}", fg="red")
+            return
+
+        t = (time.time_ns() - t1) / 1e6
+        click.secho(f"Time: {t} ms.", fg="yellow")
+        return
+
+    from custom_rsa.client import Client
+    from custom_rsa.misc import read_signed, write_signed
+    from custom_rsa.modexp import configure_engine
+    from custom_rsa.owner import Owner
+    from custom_rsa.pool import configure_pool, shutdown_pool
+    from custom_rsa.profiling import enable_profiling, span
+
+    if profile_format is not None:
+        enable_profiling()
+    profiler = cProfile.Profile() if cprofile is not None else None
+    if profiler is not None:
+        # cProfile не видит процессы пула, поэтому все считается здесь
+        processes = 1
+        profiler.enable()
+
+    try:
+        with span("run"):
+            configure_pool(processes)
+            configure_engine(modexp)
+
+            try:
+                owner = Owner(
+                    key_profile, key_id=key_id, new_key=new_key, nbits=bits
+                )
+            except KeyError as e:
+                click.secho(e.args[0], fg="red")
+                return
+            client = Client(owner.public_key)
+            nbits = ceil(owner.public_key.n.bit_length() / 8)
+
+            names = [filename.split(".") for filename in filenames]
+            originals = [make_filename(name, ext) for name, ext in names]
+
+            if sign:
+                # Несколько файлов подписываются одним пакетом в пуле
+                for (name, ext), signed in zip(
+                    names, owner.sign_files(originals)
+                ):
+                    write_signed(name, ext, signed, num_bytes=nbits)
+            elif verify:
+                signed = [
+                    read_signed(name, ext, size=nbits) for name, ext in names
+                ]
+                if len(originals) == 1:
+                    client.verify_file(originals[0], signed[0])
+                else:
+                    client.verify_files(originals, signed)
+            elif encrypt:
+                for name, ext in names:
+                    original = make_filename(name, ext)
+                    encrypted = make_filename(name, ext, ENCRYPTED_POSTFIX)
+                    if not hybrid:
+                        client.encrypt_file(original, encrypted, block=block)
+                        continue
+
+                    try:
+                        client.encrypt_hybrid_file(original, encrypted)
+                    except ValueError as e:
+                        click.secho(str(e), fg="red")
+                        break
+            elif decrypt:
+                for name, ext in names:
+                    try:
+                        _decrypt(owner, name, ext, block, byte_range)
+                    except KeyError as e:
+                        # Файл зашифрован ключом, которого нет в связке
+                        click.secho(e.args[0], fg="red")
+                    except ValueError as e:
+                        click.secho(f"{name}.{ext}: {e}", fg="red")
+
+            else:
+                click.secho("Must be choose at least one mode", fg="red")
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile)
+
+        t2 = time.time_ns()
+        t = (t2 - t1) / 1e6
+        click.secho(f"Time: {t} ms.", fg="yellow")
+
+        if profile_format is not None:
+            # RUSAGE_CHILDREN учитывает процессы пула только после их завершения
+            shutdown_pool()
+            _write_profile(profile_format, profile_output)
+
+
+def _decrypt(
+    owner: "Owner",
+    name: str,
+    ext: str,
+    block: bool,
+    byte_range: tuple[int, int] | None,
+) -> None:
+    encrypted = make_filename(name, ext, ENCRYPTED_POSTFIX)
+    decrypted = make_filename(name, ext, DECRYPTED_POSTFIX)
+    if byte_range is None:
+        owner.decrypt_file(encrypted, decrypted, block=block)
+        return
+
+    data = owner.decrypt_range(encrypted, *byte_range)
+    with open(decrypted, "wb") as f:
+        f.write(data)
+
+
+def _run_remote(
+    path: str, names: list[list[str]], mode: str | None, key_id: str | None
+) -> None:
+    """Thin client: the keys and the pool live in the service"""
+    if mode is None:
         click.secho("Must be choose at least one mode", fg="red")
+        return
+
+    with ServiceClient(path) as client:
+        for name, ext in names:
+            original = make_filename(name, ext)
+            encrypted = make_filename(name, ext, ENCRYPTED_POSTFIX)
+            signed = make_filename(name, ext, SIGNED_POSTFIX)
+
+            if mode == "sign":
+                _write_bytes(signed, client.sign(_read_bytes(original), key_id))
+            elif mode == "verify":
+                verified = client.verify(
+                    _read_bytes(original), _read_bytes(signed), key_id
+                )
+                if verified:
+                    click.secho(f"{original}: Verified.", fg="green")
+                else:
+                    click.secho(f"{original}: Not verified.", fg="red")
+            elif mode == "encrypt":
+                data = client.encrypt(_read_bytes(original), key_id)
+                _write_bytes(encrypted, data)
+            else:
+                decrypted = make_filename(name, ext, DECRYPTED_POSTFIX)
+                _write_bytes(decrypted, client.decrypt(_read_bytes(encrypted)))
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _write_profile(profile_format: str, output: str | None) -> None:
+    from custom_rsa.profiling import format_report, report
+
+    data = report()
+    if profile_format == "json":
+        text = json.dumps(data, indent=2)
+    else:
+        text = format_report(data)
+
+    if output is None:
+        click.echo(text)
+        return
 
-    t2 = time.time_ns()
-    t = (t2 - t1) / 1e6
-    click.secho(f"Time: {t} ms.", fg="yellow")
+    with open(output, "w") as f:
+        f.write(text)
+    click.secho(f"Profile written to {output}", fg="green")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,66 @@
+import asyncio
+
+import click
+
+from custom_rsa.keygen import FAST_PUBLIC_PROFILE, PROFILES
+from custom_rsa.owner import Owner
+from custom_rsa.pool import configure_pool
+from custom_rsa.service import SERVICE_SOCKET, RSAService
+
+
+@click.command()
+@click.option(
+    "--socket",
+    "path",
+    type=click.Path(dir_okay=False),
+    default=SERVICE_SOCKET,
+    show_default=True,
+    help="Unix domain socket to listen on.",
+)
+@click.option(
+    "--processes",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Worker processes (default: $CUSTOM_RSA_PROCESSES or CPU count).",
+)
+@click.option(
+    "--key_id",
+    default=None,
+    help="Hex prefix of the default key (default: the newest key).",
+)
+@click.option(
+    "--key_profile",
+    type=click.Choice(PROFILES),
+    default=FAST_PUBLIC_PROFILE,
+    show_default=True,
+    help="Key generation profile (used only when new keys are generated).",
+)
+def run(
+    path: str,
+    processes: int | None = None,
+    key_id: str | None = None,
+    key_profile: str = FAST_PUBLIC_PROFILE,
+) -> None:
+    configure_pool(processes)
+
+    try:
+        owner = Owner(key_profile, key_id=key_id)
+    except KeyError as e:
+        click.secho(e.args[0], fg="red")
+        return
+
+    service = RSAService(owner.keyring, owner.key_id)
+    click.secho(
+        f"Serving key {owner.key_id.hex()} on {path}", fg="green", bold=True
+    )
+
+    try:
+        asyncio.run(service.serve(path))
+    except FileExistsError as e:
+        click.secho(str(e), fg="red")
+    except KeyboardInterrupt:
+        click.secho("Stopped.", fg="yellow")
+
+
+if __name__ == "__main__":
+    run()